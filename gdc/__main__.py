@@ -13,7 +13,7 @@ Why does this file exist, and why __main__? For more info, read:
 from __future__ import absolute_import
 
 # application imports
-from .gdc import main
+from .cli import main
 
 
 if __name__ == '__main__':
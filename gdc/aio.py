@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio GitHub client for embedding in event loop services.
+
+Requires Python 3.6+ and aiohttp (pip install github-download-count[async]).
+"""
+
+# standard imports
+import asyncio
+import collections
+import json
+import logging
+
+# external imports
+import aiohttp
+
+# application imports
+from .gdc import API, PER_PAGE, Asset, Github, collect, environment_tokens
+from .scheduler import Scheduler, TokenPool
+
+# the parts of a response the scheduler needs to pace and retry requests
+_Response = collections.namedtuple('_Response', 'status_code headers text')
+
+
+# mirrors Github's attributes
+# pylint: disable=too-many-instance-attributes
+class AsyncGithub(object):
+    """
+    Interact with GitHub's API from an asyncio event loop, mirroring the
+    Github class. All requests share one connection pool and at most
+    `concurrency` of them are in flight at once.
+
+    Use as an async context manager (or await close()) to release the
+    connection pool.
+    """
+
+    # pylint: disable=protected-access
+    _check = staticmethod(Github._check)
+    _repos_path = staticmethod(Github._repos_path)
+    _skips = Github._skips
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, concurrency=10, api=API, retries=3, timeout=30,
+                 scheduler=None, tokens=None, skip_forks=False,
+                 skip_archived=False):
+        self.concurrency = max(concurrency, 1)
+        self.api = api
+        self.timeout = timeout
+        self.skip_forks = skip_forks
+        self.skip_archived = skip_archived
+
+        # every request is paced and retried by the scheduler
+        self.scheduler = scheduler or Scheduler(retries=retries)
+
+        # like Github's, requests use the pooled token with the most budget
+        tokens = environment_tokens() if tokens is None else \
+            [t for t in tokens if t]
+        self.headers = {
+            'Authorization': 'token %s' % tokens[0]
+        } if tokens else {}
+        self.pool = TokenPool(tokens, retries=retries) \
+            if len(tokens) > 1 else None
+
+        # login of the authenticated user, fetched on first use
+        self._login = None
+
+        # created on first use, from within the running event loop
+        self.semaphore = None
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Close the connection pool."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _fetch(self, url):
+        """Perform a GitHub API call and return (JSON response, next URL)."""
+        # pagination links are absolute URLs
+        if not url.startswith(('http://', 'https://')):
+            url = self.api + url
+
+        if self.session is None:
+            self.semaphore = asyncio.Semaphore(self.concurrency)
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+
+        attempt = 0
+        while True:
+            if self.pool is None:
+                scheduler, request_headers = self.scheduler, self.headers
+                delay = scheduler.acquire()
+            else:
+                token, scheduler, delay = self.pool.acquire()
+                request_headers = {'Authorization': 'token %s' % token}
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            async with self.semaphore:
+                async with self.session.get(
+                        url, headers=request_headers) as response:
+                    text = await response.text()
+                    status = response.status
+                    headers = response.headers
+                    link = response.links.get('next', {}).get('url')
+
+            result = _Response(status, headers, text)
+            scheduler.update(result)
+
+            delay = scheduler.delay(result, attempt)
+            if delay is None:
+                return (self._check(json.loads(text)),
+                        None if link is None else str(link))
+            if self.pool is not None and self.pool.available() and \
+                    headers.get('X-RateLimit-Remaining') == '0':
+                # retry at once with a token that has budget left
+                delay = 0
+
+            logging.warning('GET %s returned %d, retrying in %.1f seconds',
+                            url, status, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _paginate(self, url):
+        """Perform a paginated GitHub API call and yield each item."""
+        url += '%sper_page=%d' % ('&' if '?' in url else '?', PER_PAGE)
+
+        while url:
+            items, url = await self._fetch(url)
+            for item in items:
+                yield item
+
+    async def _request(self, url):
+        """Perform a GitHub API call and return the clean response."""
+        return (await self._fetch(url))[0]
+
+    async def iter_assets_by_repo(self, user, repo):
+        """Yield assets of every release of a particular repo."""
+        async for release in self._paginate('/repos/%s/%s/releases' %
+                                            (user, repo)):
+            for asset in release['assets']:
+                yield Asset(user, repo, release['tag_name'], asset['name'],
+                            asset['download_count'], release['id'],
+                            asset['id'])
+
+    async def iter_assets_by_user(self, user):
+        """
+        Yield assets of every repo of a particular user, repo by repo.
+        Releases are fetched concurrently as the repo listing arrives.
+        """
+        async def fetch(repo):
+            """Return a repo's assets."""
+            return [a async for a in self.iter_assets_by_repo(user, repo)]
+
+        tasks = []
+        try:
+            async for repo in self.iter_repos_by_user(user):
+                tasks.append(asyncio.ensure_future(fetch(repo)))
+            for task in tasks:
+                for asset in await task:
+                    yield asset
+        finally:
+            # cancel outstanding requests on error or cancellation
+            for task in tasks:
+                task.cancel()
+
+    async def _repos_url(self, owner):
+        """Return the URL listing an owner's repos, like Github's."""
+        if not self.headers:
+            return self._repos_path(owner)
+
+        owner_type = (await self._request('/users/%s' % owner))['type']
+        if owner_type != 'Organization' and self._login is None:
+            self._login = await self.get_user()
+        return self._repos_path(owner, owner_type, self._login)
+
+    async def iter_repos_by_user(self, user):
+        """
+        Yield repositories for particular user or organization, without
+        forks or archived repos if skipped.
+        """
+        skipped = 0
+        async for repo in self._paginate(await self._repos_url(user)):
+            if self._skips(repo):
+                skipped += 1
+            else:
+                yield repo['full_name'].split('/', 1)[1]
+        if skipped:
+            logging.info('%s: skipped %d forked or archived repos', user,
+                         skipped)
+
+    async def get_assets(self, user, repo=None, tag=None):
+        """Return assets of a particular user, repo or repo tag."""
+        if tag:
+            return await self.get_assets_by_tag(user, repo, tag)
+        if repo:
+            return [a async for a in self.iter_assets_by_repo(user, repo)]
+        return [a async for a in self.iter_assets_by_user(user)]
+
+    async def get_assets_by_tag(self, user, repo, tag):
+        """Return assets of a particular repo tag."""
+        release = await self._request('/repos/%s/%s/releases/tags/%s' %
+                                      (user, repo, tag))
+        return [Asset(user, repo, release['tag_name'], asset['name'],
+                      asset['download_count'], release['id'], asset['id'])
+                for asset in release['assets']]
+
+    async def get_counts(self, user=None, repo=None, tag=None):
+        """
+        Return download counts of a particular user, repo or repo tag as a
+        list of Repo results (the authenticated user if user is None).
+        """
+        user = user or await self.get_user()
+        return collect(await self.get_assets(user, repo, tag))
+
+    async def get_repos_by_user(self, user):
+        """Return repositories for particular user."""
+        return [r async for r in self.iter_repos_by_user(user)]
+
+    async def get_releases_by_repo(self, user, repo):
+        """Return releases for particular repo."""
+        return [(a.name, a.download_count)
+                async for a in self.iter_assets_by_repo(user, repo)]
+
+    async def get_releases_by_tag(self, user, repo, tag):
+        """Return releases for a particular repo tag."""
+        return [(a.name, a.download_count)
+                for a in await self.get_assets_by_tag(user, repo, tag)]
+
+    async def get_releases_by_user(self, user):
+        """Return releases for a particular user."""
+        return [(r.name, [(a.name, a.download_count) for a in r.assets])
+                for r in await self.get_counts(user)]
+
+    async def get_user(self):
+        """Return the currently authenticated user."""
+        return (await self._request('/user'))['login']
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Archive of recorded API responses for offline replay."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import json
+import os
+import tempfile
+import threading
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+# application imports
+from .cache import response
+
+# headers needed to replay a response, rate limit headers are left out so
+# that replays are never paced
+HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+
+class Archive(object):
+    """
+    Record API responses in directory `path`, or replay them from it.
+
+    Responses are appended to responses.jsonl, one per line, and
+    index.json maps each request to the offset and length of its line, so
+    a lookup reads one line however many responses are recorded. Requests
+    are keyed by method, path and query (and body), not by host, so an
+    archive replays against any API URL with the same path.
+    """
+
+    def __init__(self, path, replay=False):
+        self.path = path
+        self.replay = replay
+        self.lock = threading.Lock()
+
+        if not replay and not os.path.isdir(path):
+            os.makedirs(path)
+
+        try:
+            with open(self._file('index.json')) as file_object:
+                self.index = json.load(file_object)
+        except (IOError, OSError, ValueError):
+            if replay:
+                raise
+            self.index = {}
+
+    def _file(self, name):
+        """Return the path of a file of the archive."""
+        return os.path.join(self.path, name)
+
+    @staticmethod
+    def key(method, url, body=None):
+        """Return the key of a request (body is its JSON payload)."""
+        parts = urlsplit(url)
+        key = '%s %s' % (method, parts.path)
+        if parts.query:
+            key += '?' + parts.query
+        if body is not None:
+            # imported here, hashlib loads OpenSSL which slows startup
+            import hashlib
+
+            # GraphQL queries are long, the index only keeps their digest
+            key += ' ' + hashlib.sha1(json.dumps(
+                body, sort_keys=True).encode('utf8')).hexdigest()
+        return key
+
+    def load(self, method, url, body=None):
+        """Return the recorded response to a request, or None."""
+        location = self.index.get(self.key(method, url, body))
+        if location is None:
+            return None
+
+        offset, length = location
+        with open(self._file('responses.jsonl'), 'rb') as file_object:
+            file_object.seek(offset)
+            entry = json.loads(file_object.read(length).decode('utf8'))
+        return response(url, entry['status'], entry['headers'],
+                        entry['body'])
+
+    def store(self, method, url, result, body=None):
+        """Record the response to a request, replacing any earlier one."""
+        key = self.key(method, url, body)
+        line = (json.dumps({
+            'key': key,
+            'status': result.status_code,
+            'headers': dict((h, result.headers[h]) for h in HEADERS
+                            if h in result.headers),
+            'body': result.content.decode('utf8')
+        }, separators=(',', ':')) + '\n').encode('utf8')
+
+        with self.lock:
+            with open(self._file('responses.jsonl'), 'ab') as file_object:
+                file_object.seek(0, os.SEEK_END)
+                offset = file_object.tell()
+                file_object.write(line)
+            self.index[key] = [offset, len(line)]
+
+    def save(self):
+        """Write the index atomically."""
+        descriptor, temporary = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(descriptor, 'w') as file_object:
+            with self.lock:
+                json.dump(self.index, file_object, separators=(',', ':'))
+        os.rename(temporary, self._file('index.json'))
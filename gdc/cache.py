@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Persistent on-disk cache of GitHub API responses."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import json
+import os
+import tempfile
+import threading
+import time
+
+# application imports
+from . import __program__
+
+# headers needed to rebuild a response and revalidate it later
+HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+
+def default_path():
+    """Return the per-user cache directory."""
+    return os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or
+        os.path.join(os.path.expanduser('~'), '.cache'), __program__)
+
+
+def response(url, status_code, headers, body):
+    """Return a requests Response rebuilt from its parts."""
+    # imported here, like Github._session, to keep startup fast
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+
+    result = Response()
+    result.status_code = status_code
+    result.url = url
+    result.headers = CaseInsensitiveDict(headers)
+    result.encoding = 'utf-8'
+    # pylint: disable=protected-access
+    result._content = body.encode('utf8')
+    return result
+
+
+class Cache(object):
+    """
+    Store API responses with their validators (ETag/Last-Modified) so that
+    later runs can make conditional requests and serve 304s from disk.
+
+    Entries not used for `ttl` seconds are evicted, as are the least
+    recently used entries once the cache grows beyond `max_size` bytes.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 60 * 60,
+                 max_size=64 * 1024 * 1024):
+        self.path = path or default_path()
+        self.ttl = ttl
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+
+        self.size = 0
+        self.evict()
+
+    def _entries(self):
+        """Return (mtime, size, path) of every entry, oldest first."""
+        entries = []
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def _file(self, key):
+        """Return the path of an entry."""
+        return os.path.join(self.path, key + '.json')
+
+    @staticmethod
+    def key(url, headers):
+        """Return the cache key of a request."""
+        # imported here, hashlib loads OpenSSL which slows startup
+        import hashlib
+
+        # responses differ per credential (e.g. private repos)
+        text = url + '\n' + headers.get('Authorization', '')
+        return hashlib.sha1(text.encode('utf8')).hexdigest()
+
+    def evict(self):
+        """Remove expired entries, then the oldest until below max_size."""
+        expiry = time.time() - self.ttl
+        size = 0
+        with self.lock:
+            entries = self._entries()
+            for mtime, length, path in entries:
+                if mtime < expiry:
+                    _remove(path)
+                else:
+                    size += length
+
+            for mtime, length, path in entries:
+                if size <= self.max_size * 0.9:
+                    break
+                if mtime >= expiry:
+                    _remove(path)
+                    size -= length
+
+            self.size = size
+
+    def _read(self, key):
+        """Return an unexpired entry, or None."""
+        path = self._file(key)
+        try:
+            with open(path) as file_object:
+                entry = json.load(file_object)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if os.path.getmtime(path) < time.time() - self.ttl:
+            return None
+        return entry
+
+    def _write(self, key, entry):
+        """Write an entry, evicting others if the cache is full."""
+        # write atomically, concurrent runs may share the cache
+        descriptor, temporary = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(descriptor, 'w') as file_object:
+            json.dump(entry, file_object)
+        length = os.path.getsize(temporary)
+        os.rename(temporary, self._file(key))
+
+        with self.lock:
+            self.size += length
+            full = self.size > self.max_size
+        if full:
+            self.evict()
+
+    def load(self, key):
+        """Return a cached response, or None."""
+        entry = self._read(key)
+        if entry is None or 'body' not in entry:
+            return None
+        return response(entry['url'], 200, entry['headers'], entry['body'])
+
+    def store(self, key, response):
+        """Cache a response if it carries a validator."""
+        if 'ETag' not in response.headers and \
+                'Last-Modified' not in response.headers:
+            return
+
+        entry = {
+            'url': response.url,
+            'headers': dict((h, response.headers[h]) for h in HEADERS
+                            if h in response.headers),
+            'body': response.content.decode('utf8')
+        }
+        self._write(key, entry)
+
+    def load_value(self, key):
+        """Return a value cached by store_value, or None."""
+        entry = self._read(key)
+        return None if entry is None else entry.get('value')
+
+    def store_value(self, key, value):
+        """
+        Cache a JSON-serializable value, e.g. knowledge that saves a
+        request. Like responses, it expires `ttl` seconds after its last
+        use.
+        """
+        self._write(key, {'value': value})
+
+    def touch(self, key):
+        """Mark an entry as recently used."""
+        try:
+            os.utime(self._file(key), None)
+        except OSError:
+            pass
+
+
+def _remove(path):
+    """Remove a file that may have already been removed."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
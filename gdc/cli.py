@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""Command-line interface."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import, print_function
+
+# standard imports
+import argparse
+import calendar
+import logging
+import re
+import sys
+import time
+
+# application imports
+from . import __program__, __version__
+from .archive import Archive
+from .cache import Cache
+from .gdc import API, Github, GithubError, _ijson
+from .graphql import GithubGraphQL
+from .match import Matcher, compile_pattern
+from .report import show_report
+from .state import Checkpoint, RepoState
+from .stats import Stats
+from .store import DAY, WEEK, Store
+
+BACKENDS = {'graphql': GithubGraphQL, 'rest': Github}
+
+
+def _parser(args):
+    """Parse command-line options."""
+
+    parser = argparse.ArgumentParser(
+        add_help=False,
+        description='Display download counts of GitHub releases.')
+
+    parser.add_argument(
+        'user',
+        help='GitHub username or organization (comma-separate several '
+        'owners)',
+        metavar='USER',
+        nargs='?')
+    parser.add_argument(
+        'repo',
+        help='GitHub repository',
+        metavar='REPO',
+        nargs='?')
+    parser.add_argument(
+        'tag',
+        help='release tag',
+        metavar='RELEASE',
+        nargs='?')
+    parser.add_argument(
+        '-s', '--summarize',
+        action='store_true',
+        help='display only a total download count')
+    parser.add_argument(
+        '-j', '--jobs',
+        default=1,
+        help='fetch releases for up to N repositories concurrently',
+        metavar='N',
+        type=int)
+    parser.add_argument(
+        '--backend',
+        choices=sorted(BACKENDS),
+        default='rest',
+        help='API used to list releases (graphql requires GITHUB_TOKEN)')
+    parser.add_argument(
+        '--api',
+        default=API,
+        help='GitHub API URL, e.g. of GitHub Enterprise (default: %s)' % API,
+        metavar='URL')
+    parser.add_argument(
+        '--tokens',
+        help='spread requests over the tokens in FILE, one per line '
+        '(default: $GITHUB_TOKENS or $GITHUB_TOKEN)',
+        metavar='FILE',
+        type=argparse.FileType('r'))
+    parser.add_argument(
+        '--cache-dir',
+        help='cache API responses in DIR (default: ~/.cache/%s)' %
+        __program__,
+        metavar='DIR')
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='do not cache API responses')
+
+    parser.add_argument(
+        '--top',
+        help='display only the N most downloaded assets (repos with -s)',
+        metavar='N',
+        type=int)
+    parser.add_argument(
+        '--min-downloads',
+        help='display only assets (repos with -s) with at least K downloads',
+        metavar='K',
+        type=int)
+    parser.add_argument(
+        '--sort',
+        choices=('downloads', 'name'),
+        help='order assets (repos with -s) by download count or name')
+    parser.add_argument(
+        '--include',
+        action='append',
+        help='only count assets whose name matches PATTERN, a glob or a '
+        're:REGEX (repeatable)',
+        metavar='PATTERN')
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        help='do not count assets whose name matches PATTERN (repeatable)',
+        metavar='PATTERN')
+    parser.add_argument(
+        '--group-by',
+        choices=('extension', 'pattern', 'release'),
+        help='sum download counts per release, file extension or matching '
+        '--include pattern')
+    parser.add_argument(
+        '--skip-forks',
+        action='store_true',
+        help='do not fetch releases of forked repositories')
+    parser.add_argument(
+        '--skip-archived',
+        action='store_true',
+        help='do not fetch releases of archived repositories')
+    parser.add_argument(
+        '-t', '--targets',
+        help='read USER[/REPO[/RELEASE]] targets, one per line, from FILE '
+        '(- for stdin)',
+        metavar='FILE',
+        type=argparse.FileType('r'))
+    parser.add_argument(
+        '-f', '--format',
+        choices=('csv', 'jsonl', 'table'),
+        default='table',
+        help='output format, csv and jsonl stream one record per asset '
+        '(default: table)')
+    parser.add_argument(
+        '-i', '--incremental',
+        const='',
+        help='only fetch releases of repositories with activity since the '
+        'last run, remembered in FILE (default: '
+        '~/.local/share/%s/repos.json)' % __program__,
+        metavar='FILE',
+        nargs='?')
+    parser.add_argument(
+        '--resume',
+        const='',
+        help='checkpoint the repositories a scan has done in FILE and, if '
+        'an interrupted scan of the same owners left one, only fetch those '
+        'it has not done (default: ~/.local/share/%s/checkpoint.json)' %
+        __program__,
+        metavar='FILE',
+        nargs='?')
+    parser.add_argument(
+        '--max-age',
+        default=24 * 60 * 60,
+        help='with --incremental, refetch repositories without activity '
+        'after SECONDS (default: 86400)',
+        metavar='SECONDS',
+        type=int)
+    parser.add_argument(
+        '--serve',
+        help='serve download counts of the targets as Prometheus metrics '
+        'at http://[ADDRESS:]PORT/metrics, refreshed in the background',
+        metavar='[ADDRESS:]PORT',
+        type=_address)
+    parser.add_argument(
+        '--interval',
+        default=300,
+        help='with --serve, refresh download counts every SECONDS '
+        '(default: 300)',
+        metavar='SECONDS',
+        type=int)
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='decode release listings as they are downloaded, keeping only '
+        'asset names and counts (requires ijson, implies --no-cache)')
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='print a summary of API calls (latency percentiles, bytes, '
+        'retries) to stderr')
+    parser.add_argument(
+        '--record',
+        help='record every API response in the archive directory DIR '
+        '(implies --no-cache)',
+        metavar='DIR')
+    parser.add_argument(
+        '--replay',
+        help='replay API responses recorded by --record in DIR instead of '
+        'calling the API',
+        metavar='DIR')
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='log progress information')
+    parser.add_argument(
+        '--history',
+        const='',
+        help='record changed download counts in the SQLite database FILE '
+        '(default: ~/.local/share/%s/history.sqlite3)' % __program__,
+        metavar='FILE',
+        nargs='?')
+    parser.add_argument(
+        '--report',
+        action='store_true',
+        help='report downloads recorded by --history (of USER or REPO, if '
+        'given) instead of calling the API')
+    parser.add_argument(
+        '--since',
+        help='with --report, start of the window, a DATE[THH:MM:SS] (UTC) '
+        'or a duration before now such as 12h, 7d or 4w (default: 1w)',
+        metavar='WHEN',
+        type=_when)
+    parser.add_argument(
+        '--until',
+        help='with --report, end of the window (default: now)',
+        metavar='WHEN',
+        type=_when)
+    parser.add_argument(
+        '--every',
+        choices=('day', 'week'),
+        help='with --report, report downloads in each day or week (UTC, '
+        'from Monday) of the window')
+    parser.add_argument(
+        '--by',
+        choices=('asset', 'repo', 'user'),
+        default='repo',
+        help='with --report, sum downloads per asset, repo or user '
+        '(default: repo)')
+
+    pgroup = parser.add_argument_group('program options')
+    pgroup.add_argument(
+        '-h', '--help',
+        action='help',
+        help=argparse.SUPPRESS)
+    pgroup.add_argument(
+        '--version',
+        action='version',
+        help=argparse.SUPPRESS,
+        version='%(prog)s ' + __version__)
+
+    options = parser.parse_args(args)
+    if options.group_by == 'pattern' and not options.include:
+        parser.error('--group-by pattern requires --include')
+    if options.record and options.replay:
+        parser.error('--record and --replay are mutually exclusive')
+    for pattern in (options.include or []) + (options.exclude or []):
+        try:
+            compile_pattern(pattern)
+        except re.error as error:
+            parser.error('invalid pattern %r: %s' % (pattern, error))
+    return options
+
+
+def _address(text):
+    """Return the (address, port) of an [ADDRESS:]PORT argument."""
+    address, _, port = text.rpartition(':')
+    try:
+        return address, int(port)
+    except ValueError:
+        raise argparse.ArgumentTypeError('invalid port: %r' % text)
+
+
+def _when(text):
+    """
+    Return the timestamp of a DATE[THH:MM:SS] (UTC) argument, or of a
+    duration before now such as 12h, 7d or 4w.
+    """
+    match = re.match(r'^(\d+)([hdw])$', text)
+    if match:
+        return time.time() - int(match.group(1)) * \
+            {'h': 60 * 60, 'd': DAY, 'w': WEEK}[match.group(2)]
+
+    for pattern in ('%Y-%m-%d', '%Y-%m-%dT%H:%M:%S'):
+        try:
+            return calendar.timegm(time.strptime(text, pattern))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError('invalid time: %r' % text)
+
+
+def read_targets(lines):
+    """Yield (user, repo, tag) targets from USER[/REPO[/TAG]] lines."""
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            parts = line.split('/', 2)
+            yield tuple(parts + [None] * (3 - len(parts)))
+
+
+def read_tokens(lines):
+    """Return the tokens of lines, one per line."""
+    return [line.strip() for line in lines
+            if line.strip() and not line.strip().startswith('#')]
+
+
+def _github(options, stats):
+    """
+    Return the client of the backend configured by command-line options,
+    exiting if they cannot be used.
+    """
+    # cached responses are read whole, they are never streamed
+    cache = None if options.no_cache or options.stream or options.record or \
+        options.replay else Cache(options.cache_dir)
+    store = None if options.history is None else Store(options.history)
+    state = None if options.incremental is None else \
+        RepoState(options.incremental, options.max_age)
+    checkpoint = None if options.resume is None else \
+        Checkpoint(options.resume)
+    matcher = Matcher(options.include, options.exclude) \
+        if options.include or options.exclude else None
+    if options.stream and _ijson() is None:
+        logging.error('--stream requires ijson (pip install %s[stream])',
+                      __program__)
+        sys.exit(1)
+    try:
+        archive = Archive(options.replay, replay=True) if options.replay \
+            else Archive(options.record) if options.record else None
+    except (IOError, OSError, ValueError) as error:
+        logging.error('cannot open archive: %s', error)
+        sys.exit(1)
+    return BACKENDS[options.backend](
+        jobs=options.jobs, api=options.api, cache=cache, store=store,
+        state=state, hooks=[stats] if stats else None,
+        stream=options.stream, matcher=matcher,
+        skip_forks=options.skip_forks, skip_archived=options.skip_archived,
+        archive=archive, checkpoint=checkpoint,
+        keep_going=not options.serve,
+        tokens=read_tokens(options.tokens) if options.tokens else None)
+
+
+def main(args=None):
+    """Start application."""
+    options = _parser(args)
+    logging.basicConfig(format='%(levelname)s: %(message)s',
+                        level=logging.INFO if options.verbose else
+                        logging.WARNING)
+
+    if options.report:
+        store = Store(options.history or None)
+        try:
+            show_report(store, options.since, options.until, options.every,
+                        options.by, options.user, options.repo,
+                        options.format)
+        finally:
+            store.close()
+        return
+
+    stats = Stats() if options.stats else None
+    github = _github(options, stats)
+
+    failed = 0
+    try:
+        if options.serve:
+            # imported here, only --serve needs the HTTP server
+            from .exporter import Exporter
+            targets = read_targets(options.targets) if options.targets else \
+                [(options.user or github.get_user(), options.repo,
+                  options.tag)]
+            exporter = Exporter(github, targets, options.interval)
+            logging.info('serving metrics at http://%s:%d/metrics',
+                         options.serve[0] or '0.0.0.0', options.serve[1])
+            exporter.serve(*options.serve)
+        elif options.targets:
+            failed = github.show_targets(read_targets(options.targets),
+                                         options.summarize, options.format)
+        else:
+            github.show(options.user, options.repo, options.tag,
+                        options.summarize, options.format, options.top,
+                        options.min_downloads, options.sort,
+                        options.group_by)
+
+        if github.failures:
+            logging.error('%d repositories failed: %s', len(github.failures),
+                          ', '.join(name for name, _ in github.failures))
+        if failed or github.failures:
+            sys.exit(1)
+    except GithubError as error:
+        logging.error(error)
+        sys.exit(1)
+    finally:
+        if github.archive is not None and not github.archive.replay:
+            github.archive.save()
+        if stats is not None:
+            for line in stats.summary():
+                print(line, file=sys.stderr)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""Prometheus exporter serving download counts refreshed in the background."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import logging
+import threading
+import time
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+# application imports
+from .gdc import GithubError, collect
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+METRICS = (
+    ('github_release_asset_downloads', 'gauge',
+     'Download count of a release asset.'),
+    ('github_repo_downloads', 'gauge',
+     'Download count of all release assets of a repository.'),
+    ('github_download_count_refresh_timestamp_seconds', 'gauge',
+     'Time of the last completed refresh.'),
+    ('github_download_count_refresh_failures_total', 'counter',
+     'Targets that failed to refresh.')
+)
+
+
+def escape(value):
+    """Escape a label value for the text exposition format."""
+    return value.replace('\\', r'\\').replace('\n', r'\n') \
+        .replace('"', r'\"')
+
+
+def render(assets, timestamp, failures):
+    """Return the text exposition of assets and refresh statistics."""
+    samples = dict((name, []) for name, _, _ in METRICS)
+
+    # targets may overlap, a series must only be exposed once
+    assets = sorted(dict(((a.user, a.repo, a.tag, a.name), a)
+                         for a in assets).values())
+
+    for asset in assets:
+        samples['github_release_asset_downloads'].append(
+            ('user="%s",repo="%s",tag="%s",asset="%s"' % tuple(
+                escape(v) for v in (asset.user, asset.repo, asset.tag,
+                                    asset.name)),
+             asset.download_count))
+
+    for repo in collect(assets):
+        samples['github_repo_downloads'].append(
+            ('user="%s",repo="%s"' % (escape(repo.user), escape(repo.name)),
+             repo.download_count))
+
+    if timestamp is not None:
+        samples['github_download_count_refresh_timestamp_seconds'].append(
+            (None, timestamp))
+    samples['github_download_count_refresh_failures_total'].append(
+        (None, failures))
+
+    lines = []
+    for name, kind, description in METRICS:
+        lines.append('# HELP %s %s' % (name, description))
+        lines.append('# TYPE %s %s' % (name, kind))
+        for labels, value in samples[name]:
+            lines.append('%s%s %s' % (
+                name, '' if labels is None else '{%s}' % labels,
+                repr(value) if isinstance(value, float) else value))
+    return ('\n'.join(lines) + '\n').encode('utf8')
+
+
+# the latest counts and the health of their refreshes are attributes
+# pylint: disable=too-many-instance-attributes
+class Exporter(object):
+    """
+    Refresh the download counts of (user, repo, tag) targets every
+    `interval` seconds and serve the latest snapshot at /metrics.
+
+    Scrapes only read the rendered snapshot, they never call GitHub.
+    """
+
+    def __init__(self, github, targets, interval=300):
+        self.github = github
+        self.targets = list(targets)
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.server = None
+
+        # the last successful fetch of each target is kept on failure
+        self.assets = {}
+        self.failures = 0
+        self.body = render([], None, 0)
+
+    def refresh(self):
+        """Fetch every target and replace the snapshot."""
+        failures = 0
+        for target in self.targets:
+            try:
+                assets = list(self.github.get_assets(*target))
+            except (GithubError, IOError) as error:
+                # a dropped connection must not stop the other targets
+                logging.error('%s: %s', '/'.join(t for t in target if t),
+                              error)
+                failures += 1
+                continue
+            if self.github.store is not None:
+                self.github.store.record(assets)
+            self.assets[target] = assets
+
+        self.failures += failures
+        body = render([a for t in self.targets for a in
+                       self.assets.get(t, [])], time.time(), self.failures)
+        with self.lock:
+            self.body = body
+        logging.info('refreshed %d targets (%d failed)', len(self.targets),
+                     failures)
+
+    def run(self):
+        """Refresh the snapshot until stopped."""
+        while not self.stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:  # pylint: disable=broad-except
+                # keep serving the previous snapshot
+                logging.exception('refresh failed')
+            self.stopped.wait(self.interval)
+
+    def serve(self, address='', port=9184):
+        """Start refreshing in the background and serve until stopped."""
+        self.start(address, port)
+        try:
+            self.server.serve_forever()
+        finally:
+            self.stop()
+
+    def start(self, address='', port=9184):
+        """Start the refresh thread and bind the HTTP server."""
+        self.server = _Server((address, port), _Handler)
+        self.server.exporter = self
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+        return self.server.server_address[:2]
+
+    def stop(self):
+        """Stop refreshing and close the HTTP server."""
+        self.stopped.set()
+        if self.server is not None:
+            self.server.server_close()
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server."""
+    daemon_threads = True
+    exporter = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serve the exporter's snapshot."""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Respond to a scrape."""
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+
+        exporter = self.server.exporter
+        with exporter.lock:
+            body = exporter.body
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Log scrapes at debug level rather than to stderr."""
+        logging.debug(*args)
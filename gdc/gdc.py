@@ -5,172 +5,958 @@
 from __future__ import absolute_import, print_function
 
 # standard imports
-import argparse
+import collections
+import heapq
+import io
 import logging
 import os
+import re
 import sys
-
-# external imports
-import requests
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import groupby, islice
+from operator import attrgetter
 
 # application imports
-from . import __program__, __version__
+from .match import Matcher, extension
+from .report import RecordWriter, bold
+from .scheduler import CORE, Budget, Scheduler, TokenPool
+from .stats import Call, template
+
+API = 'https://api.github.com'
+
+# largest page size accepted by the API
+PER_PAGE = 100
+
+Asset = collections.namedtuple(
+    'Asset', 'user repo tag name download_count release_id asset_id')
+Total = collections.namedtuple('Total', 'user repo download_count')
+Group = collections.namedtuple('Group', 'group download_count')
+
+# fields written by the csv and jsonl formats
+ASSET_FIELDS = Asset._fields[:5]
+
+# repositories whose releases are counted per query
+COUNTS_PER_QUERY = 100
+
+
+class GithubError(Exception):
+    """GitHub API error (e.g. bad credentials or an unknown repository)."""
+
+
+class Release(collections.namedtuple('Release', 'release_id tag assets')):
+    """Release and its assets."""
+    __slots__ = ()
+
+    @property
+    def download_count(self):
+        """Return the total download count of the release."""
+        return sum(a.download_count for a in self.assets)
+
+
+class Repo(collections.namedtuple('Repo', 'user name releases')):
+    """Repository and its releases (with at least one asset)."""
+    __slots__ = ()
+
+    @property
+    def assets(self):
+        """Return the assets of every release."""
+        return [a for r in self.releases for a in r.assets]
+
+    @property
+    def download_count(self):
+        """Return the total download count of the repository."""
+        return sum(r.download_count for r in self.releases)
+
+
+def _ijson():
+    """Return the ijson module (imported on first use), or None."""
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson
+
+
+def decode_releases(file_object):
+    """
+    Yield the releases of a JSON release listing as they are read, keeping
+    only the fields assets are built from (release bodies, authors and
+    uploaders are never materialized as a whole).
+    """
+    release = asset = None
+    for prefix, event, value in _ijson().parse(file_object):
+        if prefix == 'item':
+            if event == 'start_map':
+                release = {'assets': []}
+            elif event == 'end_map':
+                yield release
+        elif prefix in ('item.id', 'item.tag_name'):
+            release[prefix[5:]] = value
+        elif prefix == 'item.assets.item' and event == 'start_map':
+            asset = {}
+            release['assets'].append(asset)
+        elif prefix in ('item.assets.item.id', 'item.assets.item.name',
+                        'item.assets.item.download_count'):
+            asset[prefix[17:]] = value
 
 
+def graphql_url(api):
+    """
+    Return the GraphQL endpoint of a REST API URL, which is /api/graphql
+    rather than under /api/v3 on GitHub Enterprise.
+    """
+    api = api.rstrip('/')
+    if api.endswith('/api/v3'):
+        api = api[:-len('/v3')]
+    return api + '/graphql'
+
+
+def environment_tokens():
+    """
+    Return the tokens of $GITHUB_TOKENS (separated by whitespace or
+    commas), or else of $GITHUB_TOKEN.
+    """
+    tokens = os.environ.get('GITHUB_TOKENS', '').replace(',', ' ').split() \
+        or [os.environ.get('GITHUB_TOKEN')]
+    return [t for t in tokens if t]
+
+
+def select(records, top=None, min_downloads=None, sort=None):
+    """
+    Return records with at least min_downloads downloads, only the top
+    most downloaded if top is given (kept in a bounded heap as records
+    stream in), ordered by sort ('downloads' or 'name').
+    """
+    if min_downloads is not None:
+        records = (r for r in records if r.download_count >= min_downloads)
+
+    downloads = attrgetter('download_count')
+    if top is not None:
+        records = heapq.nlargest(top, records, key=downloads)
+    elif sort == 'downloads':
+        records = sorted(records, key=downloads, reverse=True)
+
+    if sort == 'name':
+        records = sorted(records, key=lambda r: tuple(
+            value or '' for field, value in zip(r._fields, r)
+            if field in ('group', 'user', 'repo', 'tag', 'name')))
+    return records
+
+
+def group(assets, key):
+    """Return a Group of each bucket key(asset) summing its downloads."""
+    counts = collections.OrderedDict()
+    for asset in assets:
+        bucket = key(asset)
+        counts[bucket] = counts.get(bucket, 0) + asset.download_count
+    return [Group(*item) for item in counts.items()]
+
+
+def totals(assets):
+    """Yield a Total of each repo of assets ordered repo by repo."""
+    for (user, repo), group in groupby(assets, attrgetter('user', 'repo')):
+        yield Total(user, repo, sum(a.download_count for a in group))
+
+
+def collect(assets):
+    """Return Repo results of assets ordered repo by repo."""
+    return [Repo(user, repo, [
+        Release(release_id, tag, list(group))
+        for (release_id, tag), group in groupby(
+            repo_assets, attrgetter('release_id', 'tag'))
+    ]) for (user, repo), repo_assets in groupby(
+        assets, attrgetter('user', 'repo'))]
+
+
+# each optional collaborator (cache, store, state, ...) is an attribute
+# pylint: disable=too-many-instance-attributes
 class Github(object):
     """Interact with GitHub's API."""
 
-    def __init__(self):
+    # pylint: disable=too-many-arguments
+    def __init__(self, jobs=1, api=API, pool_size=None, retries=3,
+                 timeout=30, cache=None, scheduler=None, store=None,
+                 state=None, hooks=None, stream=False, matcher=None,
+                 skip_forks=False, skip_archived=False, archive=None,
+                 checkpoint=None, keep_going=False, tokens=None):
         logging.basicConfig(format='%(levelname)s: %(message)s')
 
+        # number of repositories to fetch releases for concurrently
+        self.jobs = max(jobs, 1)
+
+        self.api = api
+        self.graphql = graphql_url(api)
+        self.timeout = timeout
+
+        # optional Cache used for conditional requests
+        self.cache = cache
+
+        # optional Archive every response is recorded in or replayed from
+        self.archive = archive
+
+        # optional Store recording a snapshot of everything show() fetches
+        self.store = store
+
+        # optional RepoState used to skip repos without new activity
+        self.state = state
+
+        # optional Checkpoint of the repos completed by user scans
+        self.checkpoint = checkpoint
+
+        # (repo, error) of failed repos if user scans keep going
+        # past them rather than raising
+        self.keep_going = keep_going
+        self.failures = []
+
+        # every request is paced and retried by the scheduler
+        self.scheduler = scheduler or Scheduler(retries=retries)
+
+        # optional Matcher selecting assets by name
+        self.matcher = matcher
+
+        # repos left out of user listings before any release requests
+        self.skip_forks = skip_forks
+        self.skip_archived = skip_archived
+
+        # callables passed a Call as each API call completes
+        self.hooks = list(hooks or [])
+
+        # decode release listings incrementally as they are downloaded
+        if stream and _ijson() is None:
+            raise ImportError('streaming requires ijson')
+        self.stream = stream
+
+        tokens = environment_tokens() if tokens is None else \
+            [t for t in tokens if t]
+
+        # the first token identifies requests (e.g. in cache keys), the
+        # pool sends each with the token that has the most budget left
         self.headers = {
-            'Authorization': 'token %s' % os.environ['GITHUB_TOKEN']
-        } if os.environ.get('GITHUB_TOKEN') else {}
+            'Authorization': 'token %s' % tokens[0]
+        } if tokens else {}
+        self.pool = TokenPool(tokens, retries=retries) \
+            if len(tokens) > 1 else None
+
+        self.session = self._session(pool_size or max(self.jobs, 10), retries)
+
+        # login of the authenticated user, fetched on first use
+        self._login = None
+
+    @staticmethod
+    def _session(pool_size, retries):
+        """Return a keep-alive session shared by all API calls."""
+        # imported here, requests dominates the startup time of the CLI
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        # retry connection errors, error responses are retried by the
+        # scheduler which knows about rate limits
+        retry = Retry(total=retries, backoff_factor=0.5)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              max_retries=retry)
+
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @staticmethod
+    def _check(response):
+        """Return the JSON response or raise if it is an error message."""
+        try:
+            # message key is indicative of a malformed request
+            message = response['message']
+        except (KeyError, TypeError):
+            return response
+        raise GithubError(message)
+
+    def _fetch(self, url, stream=False):
+        """
+        Perform a GitHub API call and return the raw response, with its
+        body unread if streamed (cached responses are never streamed).
+        """
+        # pagination links are absolute URLs
+        if not url.startswith(('http://', 'https://')):
+            url = self.api + url
+
+        if not self.cache:
+            return self._send('GET', url, headers=self.headers,
+                              stream=stream)
+
+        key = self.cache.key(url, self.headers)
+        cached = self.cache.load(key)
+
+        headers = dict(self.headers)
+        if cached is not None:
+            if 'ETag' in cached.headers:
+                headers['If-None-Match'] = cached.headers['ETag']
+            if 'Last-Modified' in cached.headers:
+                headers['If-Modified-Since'] = cached.headers['Last-Modified']
+
+        response = self._send('GET', url, headers=headers)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(key)
+            return cached
+        if response.status_code == 200:
+            self.cache.store(key, response)
+        return response
+
+    def _avoid(self, url):
+        """Report an API call made unnecessary by what is already known."""
+        if self.hooks:
+            call = Call('GET', template(url), self.api + url, None, 0, 0, 0,
+                        'avoided', None)
+            for hook in self.hooks:
+                hook(call)
+
+    def _emit(self, method, url, response, latency, retries, stream=False):
+        """Report a completed API call to the hooks."""
+        headers = response.headers
+        rate_limit = Budget(int(headers['X-RateLimit-Limit']),
+                            int(headers['X-RateLimit-Remaining']),
+                            int(headers['X-RateLimit-Reset'])) \
+            if 'X-RateLimit-Remaining' in headers else None
+        cache = None if not self.cache or method != 'GET' else \
+            'hit' if response.status_code == 304 else 'miss'
+
+        # a streamed body has not been read yet
+        size = int(headers.get('Content-Length', 0)) if stream else \
+            len(response.content)
+
+        call = Call(method, template(url), url, response.status_code, size,
+                    latency, retries, cache, rate_limit)
+        for hook in self.hooks:
+            hook(call)
+
+    def _send(self, method, url, **kwargs):
+        """
+        Send a request when the scheduler allows it, retrying failures
+        (or replay its recorded response).
+        """
+        if self.archive is not None and self.archive.replay:
+            response = self.archive.load(method, url, kwargs.get('json'))
+            if response is None:
+                raise GithubError('%s %s was not recorded' % (method, url))
+            if self.hooks:
+                self._emit(method, url, response, 0, 0)
+            return response
+
+        # GraphQL queries spend a budget of their own
+        resource = 'graphql' if url == self.graphql else CORE
+        attempt = 0
+        start = None
+        while True:
+            if self.pool is None:
+                scheduler = self.scheduler
+                scheduler.wait(resource)
+            else:
+                token, scheduler = self.pool.wait(resource)
+                kwargs['headers'] = dict(kwargs.get('headers') or {},
+                                         Authorization='token %s' % token)
+            start = start or time.time()
+            response = self.session.request(method, url, timeout=self.timeout,
+                                            **kwargs)
+            scheduler.update(response)
+
+            delay = scheduler.delay(response, attempt)
+            if delay is None:
+                break
+            if self.pool is not None and self.pool.available(resource) and \
+                    response.headers.get('X-RateLimit-Remaining') == '0':
+                # retry at once with a token that has budget left
+                delay = 0
+
+            logging.warning('%s %s returned %d, retrying in %.1f seconds',
+                            method, url, response.status_code, delay)
+            response.close()
+            scheduler.sleep(delay)
+            attempt += 1
+
+        if self.archive is not None:
+            self.archive.store(method, url, response, kwargs.get('json'))
+        if self.hooks:
+            self._emit(method, url, response, time.time() - start, attempt,
+                       kwargs.get('stream', False))
+        return response
 
     def _get(self, url):
         """Perform a GitHub API call and return the JSON response."""
-        return requests.get('https://api.github.com' + url,
-                            headers=self.headers).json()
+        return self._fetch(url).json()
+
+    def _graphql(self, query, **variables):
+        """Perform a GitHub GraphQL API call and return the clean data."""
+        response = self._check(self._send(
+            'POST', self.graphql, headers=self.headers,
+            json={'query': query, 'variables': variables}).json())
+
+        if response.get('errors'):
+            raise GithubError(response['errors'][0]['message'])
+
+        return response['data']
+
+    def _list(self, url):
+        """
+        Return every item of a paginated GitHub API call. When the first
+        page links to the last, the remaining pages are fetched
+        concurrently.
+        """
+        url += '%sper_page=%d' % ('&' if '?' in url else '?', PER_PAGE)
+        response = self._fetch(url)
+        items = list(self._check(response.json()))
+
+        last = response.links.get('last', {}).get('url')
+        match = re.search(r'([?&]page=)(\d+)', last or '')
+        if self.jobs == 1 or match is None:
+            url = response.links.get('next', {}).get('url')
+            if url:
+                items.extend(self._paginate(url))
+            return items
+
+        urls = [last[:match.start(2)] + str(page) + last[match.end(2):]
+                for page in range(2, int(match.group(2)) + 1)]
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for page in executor.map(self._request, urls):
+                items.extend(page)
+        return items
+
+    def _paginate(self, url, decode=None):
+        """
+        Perform a paginated GitHub API call and yield each item, decoded
+        from each page's body by decode(file_object) if given.
+        """
+        if 'per_page=' not in url:
+            url += '%sper_page=%d' % ('&' if '?' in url else '?', PER_PAGE)
+
+        while url:
+            streamed = decode is not None and not self.cache and \
+                self.archive is None
+            response = self._fetch(url, stream=streamed)
+            try:
+                if decode is None or response.status_code != 200:
+                    items = self._check(response.json())
+                elif streamed:
+                    response.raw.decode_content = True
+                    items = decode(response.raw)
+                else:
+                    items = decode(io.BytesIO(response.content))
+                for item in items:
+                    yield item
+            finally:
+                if streamed:
+                    response.close()
+            url = response.links.get('next', {}).get('url')
 
     @staticmethod
-    def _print(releases, summarize=False):
-        """Print download counts of releases."""
+    def _print(counts, summarize=False):
+        """Print download counts of the assets of Repo results."""
+        assets = [a for r in counts for a in r.assets]
         if summarize:
-            print(sum(i[1] for i in releases))
-        else:
-            try:
-                column_width = max(len(str(d)) for n, d in releases) + 2
-            except ValueError:
-                sys.exit(0)
-            for name, download_count in releases:
-                print(str(download_count).ljust(column_width), name)
+            print(sum(a.download_count for a in assets))
+        elif assets:
+            column_width = max(len(str(a.download_count))
+                               for a in assets) + 2
+            for asset in assets:
+                print(str(asset.download_count).ljust(column_width),
+                      asset.name)
 
     @staticmethod
-    def _print_all(all_releases, summarize=False):
-        """Print download counts of all releases."""
+    def _print_records(records, label):
+        """Print download counts of records with label(record)."""
+        if not records:
+            return
+
+        column_width = max(len(str(r.download_count)) for r in records) + 2
+        for record in records:
+            print(str(record.download_count).ljust(column_width),
+                  label(record))
+
+    @staticmethod
+    def _print_all(counts, summarize=False):
+        """Print download counts of Repo results, repo by repo."""
+        if not counts:
+            return
+
         if summarize:
-            data = []
-            for repo, releases in all_releases:
-                data.append((repo, sum(r[1] for r in releases)))
-            try:
-                column_width = max(len(str(d[1])) for d in data) + 2
-            except ValueError:
-                sys.exit(0)
-            for repo, total in data:
-                print(str(total).ljust(column_width), repo)
+            column_width = max(len(str(r.download_count))
+                               for r in counts) + 2
+            for repo in counts:
+                print(str(repo.download_count).ljust(column_width),
+                      repo.name)
         else:
-            try:
-                column_width = max(
-                    len(str(d)) for o, r in all_releases for n, d in r) + 2
-            except ValueError:
-                sys.exit(0)
-            for repo, releases in all_releases:
-                print(bold(repo))
-                for name, download_count in releases:
-                    print(str(download_count).ljust(column_width), name)
+            column_width = max(len(str(a.download_count))
+                               for r in counts for a in r.assets) + 2
+            for repo in counts:
+                print(bold(repo.name))
+                for asset in repo.assets:
+                    print(str(asset.download_count).ljust(column_width),
+                          asset.name)
                 print()
 
     def _request(self, url):
         """Perform a GitHub API call and return the clean response."""
-        response = self._get(url)
+        return self._check(self._get(url))
+
+    def _write(self, assets, output, summarize=False, header=True):
+        """Write assets (or per-repo totals) as JSON Lines or CSV."""
+        if summarize:
+            fields, records = Total._fields, totals(assets)
+        else:
+            fields, records = ASSET_FIELDS, assets
+
+        writer = RecordWriter(sys.stdout, output, fields, header)
+        for record in records:
+            writer.write(record)
+
+    def get_assets(self, user, repo=None, tag=None):
+        """
+        Yield assets of a particular user, repo or repo tag (only those
+        selected by the matcher, if any).
+        """
+        if tag:
+            assets = self.get_assets_by_tag(user, repo, tag)
+        elif repo:
+            assets = self.get_assets_by_repo(user, repo)
+        else:
+            assets = self.get_assets_by_user(user)
+
+        if self.matcher is None:
+            return assets
+        return (a for a in assets if self.matcher(a.name))
+
+    def get_assets_by_repo(self, user, repo):
+        """Yield assets of every release of a particular repo."""
+        for assets in self._assets_by_release(user, repo):
+            for asset in assets:
+                yield asset
+
+    def _assets_by_release(self, user, repo):
+        """Yield a list of assets per release of a particular repo."""
+        for release in self._paginate(
+                '/repos/%s/%s/releases' % (user, repo),
+                decode_releases if self.stream else None):
+            yield [Asset(user, repo, release['tag_name'], asset['name'],
+                         asset['download_count'], release['id'], asset['id'])
+                   for asset in release['assets']]
+
+    def get_assets_by_tag(self, user, repo, tag):
+        """Yield assets of a particular repo tag."""
+        release = self._request('/repos/%s/%s/releases/tags/%s' %
+                                (user, repo, tag))
+        for asset in release['assets']:
+            yield Asset(user, repo, release['tag_name'], asset['name'],
+                        asset['download_count'], release['id'], asset['id'])
+
+    def get_assets_by_user(self, user):
+        """
+        Yield assets of every repo of a particular user or organization
+        (or of several comma-separated owners), repo by repo.
+        """
+        repos = self._repos_to_fetch(user)
+        failures = len(self.failures)
+        skipped = self.state.skipped if self.state is not None else 0
 
         try:
-            # message key is indicative of a malformed request
-            logging.error(response['message'])
-            sys.exit(1)
-        except (KeyError, TypeError):
-            return response
+            for asset in self._fetch_repos(user, repos):
+                yield asset
+        except BaseException:
+            # keep what was done for the scan to be resumed
+            if self.checkpoint is not None:
+                self.checkpoint.save()
+            raise
+
+        if self.checkpoint is not None:
+            if len(self.failures) == failures:
+                self.checkpoint.finish(user)
+            else:
+                self.checkpoint.save()
+
+        if self.state is not None:
+            self.state.save()
+            logging.info('%s: skipped %d release requests for repos without '
+                         'new activity', user, self.state.skipped - skipped)
+
+    def _repos_to_fetch(self, user):
+        """
+        Return the repos of a user scan whose releases are fetched, i.e.
+        those not known to be empty nor done by an interrupted scan.
+        """
+        owners = user.split(',')
+        # unless a stage needs every repo first, releases are fetched from
+        # the first page of the listing on
+        if len(owners) == 1 and self.jobs == 1 and self.checkpoint is None:
+            return self._skip_empty_pages(self._list_repos(user, lazy=True))
+
+        if len(owners) == 1:
+            repos = self._list_repos(user)
+        else:
+            # discover every owner's repos concurrently
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                repos = [r for listing in executor.map(self._list_repos,
+                                                       owners)
+                         for r in listing]
+
+        if self.checkpoint is not None:
+            return self._resume(user, repos)
+        return self._skip_empty(repos)
+
+    def _resume(self, user, repos):
+        """
+        Return the repos a user scan has not done yet, if interrupted,
+        without those known to be empty.
+        """
+        self.checkpoint.start(user)
+        done = set(r['full_name'] for r in repos if self.checkpoint.get(
+            user, r['full_name']) is not None)
+        if done:
+            logging.info('%s: resuming with %d of %d repos done', user,
+                         len(done), len(repos))
+        kept = set(r['full_name'] for r in self._skip_empty(
+            [r for r in repos if r['full_name'] not in done])) | done
+        return [r for r in repos if r['full_name'] in kept]
+
+    def _fetch_repos(self, user, repos):
+        """Yield assets of a user scan's repos, repo by repo."""
+        if self.jobs == 1:
+            for repo in repos:
+                for asset in self._fetch_repo(user, repo):
+                    yield asset
+            return
+
+        # Executor.map yields results in submission order, so the output
+        # is identical to the serial path
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for assets in executor.map(
+                    lambda repo: self._fetch_repo(user, repo), repos):
+                for asset in assets:
+                    yield asset
+
+    def _fetch_repo(self, user, repo):
+        """
+        Return a repo's assets, remembered from a checkpoint or previous
+        run if possible. Unless keep_going is False, a repo that fails is
+        recorded in failures and has none.
+        """
+        name = repo['full_name']
+        assets = self.checkpoint.get(user, name) if self.checkpoint \
+            else None
+        if assets is None and self.state is not None:
+            assets = self.state.get(repo)
+        if assets is not None:
+            self._avoid('/repos/%s/releases' % name)
+            assets = [Asset(*a) for a in assets]
+        else:
+            try:
+                releases = list(self._assets_by_release(*name.split('/', 1)))
+            except (GithubError, IOError) as error:
+                if not self.keep_going:
+                    raise
+                # carry on with other repos, reported at the end
+                logging.error('%s: %s', name, error)
+                self.failures.append((name, str(error)))
+                return []
+            assets = [a for r in releases for a in r]
+            if self.state is not None:
+                self.state.set(repo, assets)
+            # a release may get its assets later without a push
+            if not releases:
+                self._remember_empty(repo)
+
+        if self.checkpoint is not None:
+            self.checkpoint.set(user, name, assets)
+        return assets
+
+    def _empty_key(self, repo):
+        """Return the cache key of what is known of a repo's releases."""
+        return self.cache.key(
+            '%s/repos/%s/releases#empty' % (self.api, repo['full_name']),
+            self.headers)
+
+    def _remember_empty(self, repo):
+        """Remember a repo has no release assets until it is pushed to."""
+        if self.cache and repo.get('pushed_at'):
+            self.cache.store_value(self._empty_key(repo), repo['pushed_at'])
+
+    def _release_counts(self, repos):
+        """
+        Return the number of releases of each repo (by full name), counted
+        by GraphQL for up to COUNTS_PER_QUERY repos per query.
+        """
+        counts = {}
+        for start in range(0, len(repos), COUNTS_PER_QUERY):
+            batch = repos[start:start + COUNTS_PER_QUERY]
+            variables = {}
+            fields = []
+            for index, repo in enumerate(batch):
+                owner, name = repo['full_name'].split('/', 1)
+                variables['owner%d' % index] = owner
+                variables['name%d' % index] = name
+                fields.append('r%d: repository(owner: $owner%d, name: '
+                              '$name%d) { releases { totalCount } }' %
+                              ((index,) * 3))
+            query = 'query(%s) { %s }' % (
+                ', '.join('$%s: String!' % v for v in sorted(variables)),
+                ' '.join(fields))
+
+            data = self._graphql(query, **variables)
+            for index, repo in enumerate(batch):
+                counts[repo['full_name']] = \
+                    data['r%d' % index]['releases']['totalCount']
+        return counts
+
+    def _skip_empty(self, repos):
+        """
+        Return repos without those known to have no release assets, from
+        a previous run (until they are pushed to) or, if authenticated,
+        from a count of their releases, reporting the avoided requests.
+        """
+        unknown = [r for r in repos
+                   if not self.cache or not r.get('pushed_at') or
+                   self.cache.load_value(self._empty_key(r)) !=
+                   r['pushed_at']]
+
+        if self.headers and unknown:
+            try:
+                counts = self._release_counts(unknown)
+            except GithubError as error:
+                # carry on without counts, e.g. if GraphQL is unavailable
+                logging.warning('could not count releases: %s', error)
+            else:
+                for repo in unknown:
+                    if not counts[repo['full_name']]:
+                        self._remember_empty(repo)
+                unknown = [r for r in unknown if counts[r['full_name']]]
+
+        if len(unknown) != len(repos):
+            kept = set(r['full_name'] for r in unknown)
+            for repo in repos:
+                if repo['full_name'] not in kept:
+                    self._avoid('/repos/%s/releases' % repo['full_name'])
+            logging.info('skipped %d release requests for repos without '
+                         'releases', len(repos) - len(unknown))
+        return unknown
+
+    def _skip_empty_pages(self, repos):
+        """Yield repos of an iterable, skipping empty ones page by page."""
+        repos = iter(repos)
+        while True:
+            page = list(islice(repos, PER_PAGE))
+            if not page:
+                return
+            for repo in self._skip_empty(page):
+                yield repo
+
+    def _repos_url(self, owner):
+        """
+        Return the URL listing an owner's repos. Unauthenticated calls
+        only see public repos, which /users/:user/repos lists for users
+        and organizations alike. Authenticated calls list the private
+        repos of organizations and of the authenticated user too.
+        """
+        if not self.headers:
+            return self._repos_path(owner)
+
+        owner_type = self._request('/users/%s' % owner)['type']
+        if owner_type != 'Organization' and self._login is None:
+            self._login = self.get_user()
+        return self._repos_path(owner, owner_type, self._login)
+
+    @staticmethod
+    def _repos_path(owner, owner_type=None, login=None):
+        """
+        Return the URL listing an owner's repos given its type and the
+        login of the authenticated user (both None if unauthenticated).
+        """
+        if owner_type == 'Organization':
+            return '/orgs/%s/repos?type=all' % owner
+        if login is not None and owner.lower() == login.lower():
+            return '/user/repos?affiliation=owner'
+        return '/users/%s/repos' % owner
+
+    def _skips(self, repo):
+        """Return whether a listed repo is skipped as a fork or archived."""
+        return (self.skip_forks and repo.get('fork')) or \
+            (self.skip_archived and repo.get('archived'))
+
+    def _filter_repos(self, user, repos):
+        """Yield repos, without forks or archived repos if skipped."""
+        skipped = 0
+        for repo in repos:
+            if self._skips(repo):
+                skipped += 1
+            else:
+                yield repo
+        if skipped:
+            logging.info('%s: skipped %d forked or archived repos', user,
+                         skipped)
+
+    def _list_repos(self, user, lazy=False):
+        """
+        Return the repository listing entries of a particular user or
+        organization, without forks or archived repos if skipped. Every
+        page is fetched (concurrently) first, unless lazy, which yields
+        the entries as each page arrives.
+        """
+        url = self._repos_url(user)
+        if lazy:
+            return self._filter_repos(user, self._paginate(url))
+        return list(self._filter_repos(user, self._list(url)))
 
     def get_repos_by_user(self, user):
-        """Return repositories for particular user."""
-        response = self._request('/users/%s/repos' % user)
-        return (r['full_name'].split('/', 1)[1] for r in response)
+        """Return repositories for particular user or organization."""
+        return (r['full_name'].split('/', 1)[1]
+                for r in self._list_repos(user))
 
     def get_releases_by_repo(self, user, repo):
         """Return releases for particular repo."""
-        response = self._request('/repos/%s/%s/releases' % (user, repo))
-        return [(a['name'], a['download_count']) for p in response
-                for a in p['assets']]
+        return [(a.name, a.download_count)
+                for a in self.get_assets_by_repo(user, repo)]
 
     def get_releases_by_tag(self, user, repo, tag):
         """Return releases for a particular repo tag."""
-        response = self._request('/repos/%s/%s/releases/tags/%s' %
-                                 (user, repo, tag))
-        return [(a['name'], a['download_count']) for a in response['assets']]
+        return [(a.name, a.download_count)
+                for a in self.get_assets_by_tag(user, repo, tag)]
 
     def get_releases_by_user(self, user):
         """Return releases for a particular user."""
-        all_releases = []
-        for repo in self.get_repos_by_user(user):
-            releases = list(self.get_releases_by_repo(user, repo))
-            if releases:
-                all_releases.append((repo, releases))
-        return all_releases
+        return [(r.name, [(a.name, a.download_count) for a in r.assets])
+                for r in collect(self.get_assets_by_user(user))]
+
+    def get_counts(self, user=None, repo=None, tag=None):
+        """
+        Return download counts of a particular user, repo or repo tag as a
+        list of Repo results (the authenticated user if user is None).
+        """
+        return collect(self.get_assets(user or self.get_user(), repo, tag))
+
+    def get_rate_limit(self):
+        """Return the current core rate limit budget (costs no budget)."""
+        resources = self._request('/rate_limit')['resources']
+        for resource, budget in resources.items():
+            self.scheduler.record(budget['limit'], budget['remaining'],
+                                  budget['reset'], resource)
+        return self.scheduler.budget
 
     def get_user(self):
         """Return the currently authenticated user."""
         return self._request('/user')['login']
 
-    def show(self, user=None, repo=None, tag=None, summarize=False):
-        """Print download counts."""
+    def _group_key(self, group_by):
+        """Return the function bucketing an asset for group_by."""
+        if group_by == 'release':
+            return lambda a: '%s@%s' % (a.repo, a.tag)
+        if group_by == 'extension':
+            return lambda a: extension(a.name) or '(none)'
+        matcher = self.matcher or Matcher()
+        return lambda a: matcher.bucket(a.name)
+
+    # pylint: disable=too-many-arguments
+    def show(self, user=None, repo=None, tag=None, summarize=False,
+             output='table', top=None, min_downloads=None, sort=None,
+             group_by=None):
+        """
+        Print download counts, optionally summed per group_by bucket
+        ('release', 'extension' or the matcher's include 'pattern') and
+        only those selected by top, min_downloads and sort (see select)
+        as a ranked list.
+        """
         user = user if user else self.get_user()
 
-        if tag:
-            self._print(self.get_releases_by_tag(user, repo, tag), summarize)
-        elif repo:
-            self._print(self.get_releases_by_repo(user, repo), summarize)
+        assets = self.get_assets(user, repo, tag)
+        if self.store is not None:
+            assets = self.store.snapshot(assets)
+
+        if group_by is not None or \
+                (top, min_downloads, sort) != (None, None, None):
+            if group_by is not None:
+                fields, label = Group._fields, attrgetter('group')
+                records = group(assets, self._group_key(group_by))
+            elif summarize:
+                fields, label = Total._fields, attrgetter('repo')
+                records = totals(assets)
+            else:
+                fields, records = ASSET_FIELDS, assets
+                label = attrgetter('name') if repo else \
+                    lambda a: '%s/%s' % (a.repo, a.name)
+
+            records = select(records, top, min_downloads, sort)
+            if output != 'table':
+                writer = RecordWriter(sys.stdout, output, fields)
+                for record in records:
+                    writer.write(record)
+            else:
+                self._print_records(list(records), label)
+            return
+
+        if output != 'table':
+            self._write(assets, output, summarize)
+            return
+
+        if repo:
+            self._print(collect(assets), summarize)
+        elif ',' in user:
+            # label repos of several owners OWNER/REPO
+            self._print_all([r._replace(name='%s/%s' % (r.user, r.name))
+                             for r in collect(assets)], summarize)
         else:
-            self._print_all(self.get_releases_by_user(user), summarize)
-
-
-def _parser(args):
-    """Parse command-line options."""
-
-    parser = argparse.ArgumentParser(
-        add_help=False,
-        description='Display download counts of GitHub releases.')
-
-    parser.add_argument(
-        'user',
-        help='GitHub username',
-        metavar='USER',
-        nargs='?')
-    parser.add_argument(
-        'repo',
-        help='GitHub repository',
-        metavar='REPO',
-        nargs='?')
-    parser.add_argument(
-        'tag',
-        help='release tag',
-        metavar='RELEASE',
-        nargs='?')
-    parser.add_argument(
-        '-s', '--summarize',
-        action='store_true',
-        help='display only a total download count')
-
-    pgroup = parser.add_argument_group('program options')
-    pgroup.add_argument(
-        '-h', '--help',
-        action='help',
-        help=argparse.SUPPRESS)
-    pgroup.add_argument(
-        '--version',
-        action='version',
-        help=argparse.SUPPRESS,
-        version='%(prog)s ' + __version__)
-
-    return parser.parse_args(args)
-
-
-def bold(text):
-    """Return emboldened text."""
-    return '\033[1m' + text + '\033[0m'
-
-
-def main(args=None):
-    """Start application."""
-    options = _parser(args)
-    github = Github()
-    github.show(options.user, options.repo, options.tag, options.summarize)
+            self._print_all(collect(assets), summarize)
+
+    def show_targets(self, targets, summarize=False, output='table'):
+        """
+        Print download counts of many (user, repo, tag) targets, each as
+        soon as it has been fetched. Return the number of failed targets.
+        """
+        def fetch(target):
+            """Return a target's assets, or None if it failed."""
+            try:
+                return target, list(self.get_assets(*target))
+            except (GithubError, IOError) as error:
+                # carry on with other targets, e.g. after a dropped
+                # connection
+                logging.error(error)
+                return target, None
+
+        def emit(futures):
+            """Print completed targets and return how many failed."""
+            failures = 0
+            for future in futures:
+                (user, _, tag), assets = future.result()
+                if assets is None:
+                    failures += 1
+                    continue
+                if self.store is not None:
+                    self.store.record(assets)
+                if output != 'table':
+                    self._write(assets, output, summarize, header=False)
+                elif assets:
+                    # label repos USER/REPO[@TAG]
+                    self._print_all([
+                        r._replace(name='%s/%s%s' % (
+                            user, r.name, '@' + tag if tag else ''))
+                        for r in collect(assets)
+                    ], summarize)
+            return failures
+
+        if output != 'table':
+            # write the CSV header once, targets are written without one
+            fields = Total._fields if summarize else ASSET_FIELDS
+            RecordWriter(sys.stdout, output, fields)
+
+        failures = 0
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            # read targets lazily, keeping a bounded number in flight
+            pending = set()
+            for target in targets:
+                pending.add(executor.submit(fetch, target))
+                if len(pending) >= self.jobs * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    failures += emit(done)
+                    sys.stdout.flush()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                failures += emit(done)
+                sys.stdout.flush()
+
+        return failures
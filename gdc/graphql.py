@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""GitHub GraphQL API client."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+from concurrent.futures import ThreadPoolExecutor
+
+# application imports
+from .gdc import PER_PAGE, Asset, Github, GithubError
+
+# page sizes are kept below GraphQL's limit of 500,000 nodes per query
+RELEASES_QUERY = '''
+query($login: String!, $after: String,
+      $repos: Int!, $releases: Int!, $assets: Int!) {
+  repositoryOwner(login: $login) {
+    repositories(first: $repos, after: $after, ownerAffiliations: OWNER,
+                 orderBy: {field: NAME, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        name
+        isFork
+        isArchived
+        releases(first: $releases,
+                 orderBy: {field: CREATED_AT, direction: DESC}) {
+          pageInfo { hasNextPage }
+          nodes {
+            databaseId
+            tagName
+            releaseAssets(first: $assets) {
+              pageInfo { hasNextPage }
+              nodes { databaseId name downloadCount }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+
+class GithubGraphQL(Github):
+    """
+    Interact with GitHub's GraphQL API, fetching the releases of many
+    repositories per request. Requires an authentication token.
+    """
+
+    def get_assets_by_user(self, user):
+        """
+        Yield assets of every repo of a particular user or organization
+        (or of several comma-separated owners), repo by repo.
+        """
+        owners = user.split(',')
+        if len(owners) > 1:
+            # query every owner concurrently
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                for assets in executor.map(
+                        lambda o: list(self.get_assets_by_user(o)), owners):
+                    for asset in assets:
+                        yield asset
+            return
+
+        after = None
+
+        while True:
+            owner = self._graphql(RELEASES_QUERY, login=user, after=after,
+                                  repos=50, releases=50,
+                                  assets=PER_PAGE)['repositoryOwner']
+            if owner is None:
+                raise GithubError('Not Found')
+
+            repositories = owner['repositories']
+            for node in repositories['nodes']:
+                if (self.skip_forks and node['isFork']) or \
+                        (self.skip_archived and node['isArchived']):
+                    continue
+
+                releases = node['releases']
+                if releases['pageInfo']['hasNextPage'] or any(
+                        r['releaseAssets']['pageInfo']['hasNextPage']
+                        for r in releases['nodes']):
+                    # fall back to REST for the rare oversized repo
+                    for asset in self.get_assets_by_repo(user, node['name']):
+                        yield asset
+                    continue
+
+                for release in releases['nodes']:
+                    for asset in release['releaseAssets']['nodes']:
+                        yield Asset(user, node['name'], release['tagName'],
+                                    asset['name'], asset['downloadCount'],
+                                    release['databaseId'],
+                                    asset['databaseId'])
+
+            if not repositories['pageInfo']['hasNextPage']:
+                return
+            after = repositories['pageInfo']['endCursor']
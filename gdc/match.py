@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Asset name matching and bucketing."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import fnmatch
+import re
+
+# prefix of patterns that are regular expressions rather than globs
+REGEX = 're:'
+
+
+def compile_pattern(pattern):
+    """
+    Return the regular expression of a pattern, raising re.error if it
+    is invalid.
+    """
+    if pattern.startswith(REGEX):
+        # regular expressions match anywhere in the name
+        return re.compile(pattern[len(REGEX):])
+    # globs match the whole name
+    return re.compile('^' + fnmatch.translate(pattern))
+
+
+def compile_patterns(patterns):
+    """
+    Return a (pattern, regular expression) pair of each pattern, each
+    compiled on its own so that their flags and group references are
+    left alone.
+    """
+    return [(pattern, compile_pattern(pattern)) for pattern in patterns]
+
+
+def extension(name):
+    """Return the lowercase extension of an asset name (e.g. .tar.gz)."""
+    match = re.search(r'(?:\.tar)?\.[A-Za-z][A-Za-z0-9]*$', name)
+    return match.group(0).lower() if match else ''
+
+
+class Matcher(object):
+    """
+    Select asset names matching any include pattern (all names if there
+    are none) and no exclude pattern. Patterns are globs, or regular
+    expressions if prefixed with 're:'.
+    """
+
+    def __init__(self, include=None, exclude=None):
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self._include = compile_patterns(self.include)
+        self._exclude = compile_patterns(self.exclude)
+
+    def __call__(self, name):
+        return self.bucket(name) is not None
+
+    def bucket(self, name):
+        """
+        Return the first include pattern name matches, '' without include
+        patterns, or None if name is not selected.
+        """
+        if any(e.search(name) for _, e in self._exclude):
+            return None
+        if not self._include:
+            return ''
+
+        for pattern, expression in self._include:
+            if expression.search(name):
+                return pattern
+        return None
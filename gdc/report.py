@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Rendering of records and of reports of recorded downloads."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import, print_function
+
+# standard imports
+import collections
+import csv
+import json
+import sys
+import time
+from itertools import groupby
+from operator import attrgetter
+
+# application imports
+from .store import DAY, WEEK, Usage
+
+# downloads (and downloads per day) of an asset, repo or user from start
+Rate = collections.namedtuple(
+    'Rate', 'start user repo tag name downloads rate')
+REPORT_FIELDS = {
+    'asset': ('start', 'user', 'repo', 'tag', 'name', 'downloads', 'rate'),
+    'repo': ('start', 'user', 'repo', 'downloads', 'rate'),
+    'user': ('start', 'user', 'downloads', 'rate')
+}
+
+
+class RecordWriter(object):
+    """Write records to a stream as JSON Lines or CSV, one line each."""
+
+    def __init__(self, stream, output, fields, header=True):
+        self.stream = stream
+        self.fields = fields
+        self.csv = None
+
+        if output == 'csv':
+            self.csv = csv.writer(stream, lineterminator='\n')
+            if header:
+                self.csv.writerow(fields)
+
+    def write(self, record):
+        """Write a record, flushing so consumers see it immediately."""
+        values = [getattr(record, f) for f in self.fields]
+        if self.csv:
+            self.csv.writerow(values)
+        else:
+            self.stream.write(json.dumps(dict(zip(self.fields, values))) +
+                              '\n')
+        self.stream.flush()
+
+
+def bold(text):
+    """Return emboldened text."""
+    return '\033[1m' + text + '\033[0m'
+
+
+def rates(usages, by, days):
+    """
+    Return a Rate of each asset, repo or user (`by`) and start of Usage
+    records, summing their downloads over `days`.
+    """
+    fields = REPORT_FIELDS[by][:-2]
+    sums = collections.OrderedDict()
+    for usage in usages:
+        key = tuple(getattr(usage, f) for f in fields)
+        sums[key] = sums.get(key, 0) + usage.downloads
+
+    records = []
+    for key, downloads in sorted(sums.items()):
+        record = dict.fromkeys(Rate._fields)
+        record.update(zip(fields, key))
+        record.update(downloads=downloads, rate=round(downloads / days, 2))
+        records.append(Rate(**record))
+    return records
+
+
+# pylint: disable=too-many-arguments
+def show_report(store, since=None, until=None, every=None, by='repo',
+                user=None, repo=None, output='table'):
+    """
+    Print downloads of each asset, repo or user (`by`) recorded in store
+    between since (default: a week before until) and until (default:
+    now), or in each day or week (`every`) of that window, with their
+    downloads per day.
+    """
+    until = time.time() if until is None else until
+    since = until - WEEK if since is None else since
+
+    if every is None:
+        start = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(since))
+        records = rates([Usage(start, *d) for d in
+                         store.deltas(since, until, user, repo)],
+                        by, max(until - since, 1) / float(DAY))
+    else:
+        # the store sums the rollups, there are few distinct starts
+        period = DAY if every == 'day' else WEEK
+        starts = {}
+        records = []
+        for usage in store.usage(since, until, period, user, repo, by):
+            if usage.start not in starts:
+                starts[usage.start] = time.strftime(
+                    '%Y-%m-%d', time.gmtime(usage.start))
+            records.append(Rate(starts[usage.start], *usage[1:], rate=round(
+                usage.downloads * DAY / float(period), 2)))
+
+    if output != 'table':
+        writer = RecordWriter(sys.stdout, output, REPORT_FIELDS[by])
+        for record in records:
+            writer.write(record)
+        return
+
+    if not records:
+        return
+    columns = [max(len(str(r.downloads)) for r in records) + 2,
+               max(len('%.1f/day' % r.rate) for r in records) + 2]
+    for start, group in groupby(records, attrgetter('start')):
+        if every is not None:
+            print(bold(start))
+        for record in group:
+            print(str(record.downloads).ljust(columns[0]) +
+                  ('%.1f/day' % record.rate).ljust(columns[1]) +
+                  '/'.join(getattr(record, f) for f in
+                           REPORT_FIELDS[by][1:-2] if f != 'tag'))
+        if every is not None:
+            print()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Rate-limit-aware scheduling of GitHub API requests."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import collections
+import random
+import threading
+import time
+
+Budget = collections.namedtuple('Budget', 'limit remaining reset')
+
+# rate limit resources (X-RateLimit-Resource) have separate budgets, REST
+# requests spend core's
+CORE = 'core'
+
+
+class Scheduler(object):
+    """
+    Pace requests so the rate limit budget is never exhausted and decide
+    how long to back off before retrying a failed request.
+
+    Once fewer than `reserve` (a fraction of the limit) requests remain,
+    the rest of the budget is spread evenly until the window resets. Each
+    rate limit resource (e.g. core or graphql) is paced by its own budget.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, retries=3, backoff=1.0, reserve=0.1,
+                 sleep=time.sleep, clock=time.time):
+        self.retries = retries
+        self.backoff = backoff
+        self.reserve = reserve
+        self.sleep = sleep
+        self.clock = clock
+        self.lock = threading.Lock()
+
+        # [limit, remaining, reset, next] of each resource, next being the
+        # earliest time at which its next paced request may be sent
+        self.budgets = {}
+
+    def _state(self, resource):
+        """Return the budget of a resource (with the lock held)."""
+        return self.budgets.setdefault(resource, [None, None, None, 0])
+
+    @property
+    def budget(self):
+        """Return the last known core rate limit budget."""
+        return self.get_budget()
+
+    def get_budget(self, resource=CORE):
+        """Return the last known rate limit budget of a resource."""
+        with self.lock:
+            return Budget(*self._state(resource)[:3])
+
+    def delay(self, response, attempt):
+        """Return seconds to wait before retrying a response, or None."""
+        if attempt >= self.retries:
+            return None
+
+        status = response.status_code
+        if status == 403:
+            if 'Retry-After' not in response.headers and \
+                    response.headers.get('X-RateLimit-Remaining') != '0' and \
+                    'rate limit' not in response.text.lower():
+                # permission denied rather than rate limited
+                return None
+        elif status != 429 and status < 500:
+            return None
+
+        if 'Retry-After' in response.headers:
+            return float(response.headers['Retry-After'])
+
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            return max(float(response.headers['X-RateLimit-Reset']) -
+                       self.clock(), 0) + 1
+
+        # exponential backoff with full jitter
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def record(self, limit, remaining, reset, resource=CORE):
+        """Record an authoritative budget."""
+        with self.lock:
+            self._state(resource)[:3] = limit, remaining, reset
+
+    def update(self, response):
+        """Record the budget reported by a response."""
+        headers = response.headers
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+
+        limit = int(headers['X-RateLimit-Limit'])
+        remaining = int(headers['X-RateLimit-Remaining'])
+        reset = int(headers['X-RateLimit-Reset'])
+
+        with self.lock:
+            state = self._state(headers.get('X-RateLimit-Resource', CORE))
+            # concurrent responses may arrive out of order
+            if reset == state[2] and state[1] is not None:
+                remaining = min(remaining, state[1])
+            state[:3] = limit, remaining, reset
+
+    def acquire(self, resource=CORE):
+        """
+        Claim the next request of a resource, return seconds to wait
+        before it.
+        """
+        with self.lock:
+            state = self._state(resource)
+            limit, remaining, reset, slot = state
+            now = self.clock()
+            delay = 0
+
+            if reset is not None and now >= reset:
+                # a new window has started, its budget is unknown
+                state[1] = state[2] = None
+            elif remaining is not None:
+                if remaining <= 0:
+                    delay = reset - now + 1
+                elif remaining < limit * self.reserve:
+                    slot = max(slot, now)
+                    state[3] = slot + (reset - now) / remaining
+                    delay = slot - now
+                state[1] = remaining - 1
+
+        return delay
+
+    def wait(self, resource=CORE):
+        """Block until the next request of a resource may be sent."""
+        delay = self.acquire(resource)
+        if delay > 0:
+            self.sleep(delay)
+
+
+class TokenPool(object):
+    """
+    Spread requests over several tokens, each paced by its own Scheduler.
+
+    Every request uses the token with the most remaining budget (tokens
+    whose budget is not known yet first, in turn), so tokens that ran out
+    are parked until their window resets, unless all of them did.
+    """
+
+    def __init__(self, tokens, **kwargs):
+        self.lock = threading.Lock()
+        self.tokens = [(token, Scheduler(**kwargs)) for token in tokens]
+        self.claims = [0] * len(self.tokens)
+        self.sleep = self.tokens[0][1].sleep
+        self.clock = self.tokens[0][1].clock
+
+    def _rank(self, index, now, resource):
+        """Return the sort key of a token, the best is the greatest."""
+        budget = self.tokens[index][1].get_budget(resource)
+        if budget.remaining is None or now >= budget.reset:
+            return (float('inf'), 0, -self.claims[index])
+        return (budget.remaining, -budget.reset, -self.claims[index])
+
+    def available(self, resource=CORE):
+        """Return whether any token has budget of a resource left."""
+        now = self.clock()
+        return any(self._rank(i, now, resource)[0] > 0
+                   for i in range(len(self.tokens)))
+
+    def acquire(self, resource=CORE):
+        """
+        Claim the next request of a resource, return its token, the
+        token's scheduler and seconds to wait before it.
+        """
+        with self.lock:
+            now = self.clock()
+            index = max(range(len(self.tokens)),
+                        key=lambda i: self._rank(i, now, resource))
+            self.claims[index] += 1
+            token, scheduler = self.tokens[index]
+            return token, scheduler, scheduler.acquire(resource)
+
+    def wait(self, resource=CORE):
+        """Block until a request may be sent, return (token, scheduler)."""
+        token, scheduler, delay = self.acquire(resource)
+        if delay > 0:
+            self.sleep(delay)
+        return token, scheduler
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Per-repository state remembered between runs for incremental refresh and
+resumable scans.
+"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import json
+import os
+import tempfile
+import threading
+import time
+
+# application imports
+from . import store
+
+
+def default_path(name='repos.json'):
+    """Return a per-user state file."""
+    return os.path.join(os.path.dirname(store.default_path()), name)
+
+
+def _dump(path, value):
+    """Write a JSON file atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    descriptor, temporary = tempfile.mkstemp(dir=directory)
+    with os.fdopen(descriptor, 'w') as file_object:
+        json.dump(value, file_object)
+    os.rename(temporary, path)
+
+
+class Checkpoint(object):
+    """
+    Remember the assets of each repository scans (e.g. of each owner of
+    a targets file) have completed, saved at most every `interval`
+    seconds and when a scan stops, so that an interrupted scan can resume
+    with the repositories it had not done.
+    """
+
+    def __init__(self, path=None, interval=5):
+        self.path = path or default_path('checkpoint.json')
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.saved = time.time()
+
+        try:
+            with open(self.path) as file_object:
+                self.scans = dict(json.load(file_object)['scans'])
+        except (IOError, OSError, KeyError, TypeError, ValueError):
+            self.scans = {}
+
+    def start(self, scan):
+        """Start (or resume, if it was interrupted) a scan."""
+        with self.lock:
+            self.scans.setdefault(scan, {})
+
+    def get(self, scan, name):
+        """Return the assets of a repository a scan completed, or None."""
+        with self.lock:
+            return self.scans.get(scan, {}).get(name)
+
+    def set(self, scan, name, assets):
+        """Remember a completed repository, saving if it is time to."""
+        with self.lock:
+            self.scans.setdefault(scan, {})[name] = [list(a) for a in assets]
+            due = time.time() - self.saved >= self.interval
+        if due:
+            self.save()
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        with self.lock:
+            checkpoint = {'scans': dict((scan, dict(repos)) for scan, repos
+                                        in self.scans.items())}
+            self.saved = time.time()
+        _dump(self.path, checkpoint)
+
+    def finish(self, scan):
+        """
+        Forget a completed scan, and the checkpoint file once no other
+        scan is left.
+        """
+        with self.lock:
+            self.scans.pop(scan, None)
+            left = bool(self.scans)
+        if left:
+            self.save()
+            return
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class RepoState(object):
+    """
+    Remember each repository's activity timestamps (pushed_at/updated_at)
+    and assets so that repositories without new activity can reuse the
+    assets of a previous run instead of being fetched again.
+
+    Reused download counts are at most `max_age` seconds old.
+    """
+
+    def __init__(self, path=None, max_age=24 * 60 * 60):
+        self.path = path or default_path()
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.skipped = 0
+
+        try:
+            with open(self.path) as file_object:
+                self.repos = json.load(file_object)
+        except (IOError, OSError, ValueError):
+            self.repos = {}
+
+    @staticmethod
+    def _key(repo):
+        """Return the key of a repository listing entry."""
+        return repo['full_name']
+
+    def get(self, repo):
+        """Return stored assets of an unchanged repository, or None."""
+        with self.lock:
+            entry = self.repos.get(self._key(repo))
+
+        if entry is None or entry['fetched'] < time.time() - self.max_age or \
+                entry['pushed_at'] != repo.get('pushed_at') or \
+                entry['updated_at'] != repo.get('updated_at'):
+            return None
+
+        with self.lock:
+            self.skipped += 1
+        return entry['assets']
+
+    def save(self):
+        """Write the state file atomically."""
+        with self.lock:
+            repos = dict(self.repos)
+        _dump(self.path, repos)
+
+    def set(self, repo, assets):
+        """Remember a repository's activity timestamps and assets."""
+        with self.lock:
+            self.repos[self._key(repo)] = {
+                'assets': [list(a) for a in assets],
+                'fetched': time.time(),
+                'pushed_at': repo.get('pushed_at'),
+                'updated_at': repo.get('updated_at')
+            }
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Per-request instrumentation of GitHub API calls."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import, division
+
+# standard imports
+import collections
+import re
+import threading
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+# a completed API call as reported to hooks, cache is 'hit' (a 304 served
+# from the cache), 'miss', None (no cache) or 'avoided' (a call that was not
+# sent as its result was already known) and rate_limit a Budget or None
+Call = collections.namedtuple(
+    'Call', 'method template url status bytes latency retries cache '
+    'rate_limit')
+
+# path patterns reported instead of URLs so that calls can be aggregated
+# (compiled on first use rather than at startup)
+TEMPLATES = (
+    (r'^/users/[^/]+$', '/users/:user'),
+    (r'^/users/[^/]+/repos$', '/users/:user/repos'),
+    (r'^/orgs/[^/]+/repos$', '/orgs/:org/repos'),
+    (r'^/repos/[^/]+/[^/]+/releases$', '/repos/:owner/:repo/releases'),
+    (r'^/repos/[^/]+/[^/]+/releases/tags/.+$',
+     '/repos/:owner/:repo/releases/tags/:tag')
+)
+
+
+def percentile(values, percent):
+    """Return the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0
+    rank = max(int(-(-len(values) * percent // 100)), 1)
+    return values[rank - 1]
+
+
+def template(url):
+    """Return the path template of an API URL."""
+    path = urlsplit(url).path
+    for pattern, name in TEMPLATES:
+        if re.match(pattern, path):
+            return name
+    return path
+
+
+class Stats(object):
+    """Hook aggregating calls into a summary of latency, bytes and retries."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def __call__(self, call):
+        with self.lock:
+            self.calls.append(call)
+
+    def summary(self):
+        """Return the aggregate summary as lines of text."""
+        with self.lock:
+            calls = [c for c in self.calls if c.cache != 'avoided']
+            avoided = len(self.calls) - len(calls)
+
+        lines = [
+            '%d requests, %d retries, %d bytes, %d cache hits, %d cache '
+            'misses, %d avoided' % (
+                len(calls), sum(c.retries for c in calls),
+                sum(c.bytes for c in calls),
+                sum(1 for c in calls if c.cache == 'hit'),
+                sum(1 for c in calls if c.cache == 'miss'), avoided)
+        ]
+
+        groups = collections.defaultdict(list)
+        for call in calls:
+            groups[call.method + ' ' + call.template].append(call)
+        for name, group in [('all', calls)] + sorted(groups.items()):
+            latencies = sorted(c.latency for c in group)
+            lines.append('%-48s %6d  p50 %7.1fms  p95 %7.1fms  p99 %7.1fms' % (
+                name, len(group), percentile(latencies, 50) * 1000,
+                percentile(latencies, 95) * 1000,
+                percentile(latencies, 99) * 1000))
+        return lines
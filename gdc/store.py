@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""Historical download count snapshots stored in SQLite."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import collections
+import os
+import threading
+import time
+
+# application imports
+from . import __program__
+
+Delta = collections.namedtuple('Delta', 'user repo tag name downloads')
+Usage = collections.namedtuple('Usage', 'start user repo tag name downloads')
+
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+
+# 1970-01-01 was a Thursday, weeks start on Mondays
+OFFSETS = {DAY: 0, WEEK: 4 * DAY}
+
+# version of SCHEMA, older databases are migrated when opened
+VERSION = 1
+
+# a snapshot row is only written when an asset's count changes, the asset
+# table keeps the latest count so changes are detected without a scan
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS asset (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    release_id INTEGER NOT NULL,
+    tag TEXT NOT NULL,
+    name TEXT NOT NULL,
+    download_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS asset_repo ON asset (user, repo);
+CREATE TABLE IF NOT EXISTS snapshot (
+    asset_id INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    download_count INTEGER NOT NULL,
+    PRIMARY KEY (asset_id, time)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshot_time ON snapshot (time);
+CREATE TABLE IF NOT EXISTS rollup (
+    period INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    asset_id INTEGER NOT NULL,
+    downloads INTEGER NOT NULL,
+    PRIMARY KEY (period, start, asset_id)
+) WITHOUT ROWID;
+'''
+
+# the rollup table keeps the downloads of each asset in every day and week
+# (UTC) its count changed, so reports per period sum one range of it rather
+# than comparing snapshots. Like deltas, an asset's first count is not a
+# download
+ROLLUP = '''
+INSERT OR REPLACE INTO rollup
+SELECT :period, time - (time - :offset) % :period AS start, asset_id,
+    SUM(download_count - COALESCE((
+        SELECT download_count FROM snapshot AS previous
+        WHERE previous.asset_id = snapshot.asset_id
+        AND previous.time < snapshot.time
+        ORDER BY previous.time DESC LIMIT 1
+    ), download_count))
+FROM snapshot
+GROUP BY start, asset_id
+'''
+
+# adds the change of an asset's count to its rollup before the asset table
+# is updated
+ROLLUP_ADD = '''
+UPDATE rollup
+SET downloads = downloads + :count - COALESCE((
+    SELECT download_count FROM asset WHERE id = :asset_id
+), :count)
+WHERE period = :period AND start = :start AND asset_id = :asset_id
+'''
+
+# downloads of each asset, repo or user in each period of a range, the
+# columns not summed over are selected as NULL
+USAGE = '''
+SELECT start, user, %s, %s, %s, SUM(downloads) AS downloads
+FROM rollup JOIN asset ON asset.id = rollup.asset_id
+WHERE period = :period AND start >= :start AND start <= :end
+AND (:user IS NULL OR user = :user) AND (:repo IS NULL OR repo = :repo)
+GROUP BY 1, 2, 3, 4, 5
+HAVING downloads != 0
+ORDER BY 1, 2, 3, 4, 5
+'''
+USAGE_COLUMNS = {
+    'asset': ('repo', 'tag', 'name'),
+    'repo': ('repo', 'NULL', 'NULL'),
+    'user': ('NULL', 'NULL', 'NULL')
+}
+
+# count at the end of the window minus the count at its start, falling
+# back to the first count seen within the window for assets that were
+# not being recorded yet (so only observed downloads are reported)
+DELTAS = '''
+SELECT user, repo, tag, name, downloads FROM (
+    SELECT user, repo, tag, name, (
+        SELECT download_count FROM snapshot
+        WHERE asset_id = asset.id AND time <= :end
+        ORDER BY time DESC LIMIT 1
+    ) - COALESCE((
+        SELECT download_count FROM snapshot
+        WHERE asset_id = asset.id AND time <= :start
+        ORDER BY time DESC LIMIT 1
+    ), (
+        SELECT download_count FROM snapshot
+        WHERE asset_id = asset.id AND time > :start
+        ORDER BY time LIMIT 1
+    )) AS downloads
+    FROM asset
+    WHERE (:user IS NULL OR user = :user) AND (:repo IS NULL OR repo = :repo)
+)
+WHERE downloads IS NOT NULL
+ORDER BY user, repo, tag, name
+'''
+
+
+def floor(timestamp, period):
+    """Return the start of the day or week (UTC) of a timestamp."""
+    return timestamp - (timestamp - OFFSETS[period]) % period
+
+
+def default_path():
+    """Return the per-user history database."""
+    return os.path.join(
+        os.environ.get('XDG_DATA_HOME') or
+        os.path.join(os.path.expanduser('~'), '.local', 'share'),
+        __program__, 'history.sqlite3')
+
+
+class Store(object):
+    """Record snapshots of asset download counts as they change."""
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # imported here, most runs do not record history
+        import sqlite3
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            if self.connection.execute(
+                    'PRAGMA user_version').fetchone()[0] < VERSION:
+                # roll up the snapshots recorded before rollups were
+                for period in OFFSETS:
+                    self.connection.execute(ROLLUP, {
+                        'period': period, 'offset': OFFSETS[period]})
+                self.connection.execute('PRAGMA user_version = %d' % VERSION)
+
+    def _counts(self):
+        """Return the latest recorded count of every asset."""
+        with self.lock:
+            return dict(self.connection.execute(
+                'SELECT id, download_count FROM asset'))
+
+    def _write(self, assets, timestamp):
+        """Record changed assets in a single transaction."""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        rollups = [{'period': period, 'start': floor(timestamp, period),
+                    'asset_id': a.asset_id, 'count': a.download_count}
+                   for period in OFFSETS for a in assets]
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO rollup VALUES '
+                '(:period, :start, :asset_id, 0)', rollups)
+            self.connection.executemany(ROLLUP_ADD, rollups)
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO asset VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((a.asset_id, a.user, a.repo, a.release_id, a.tag, a.name,
+                  a.download_count) for a in assets))
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO snapshot VALUES (?, ?, ?)',
+                ((a.asset_id, timestamp, a.download_count) for a in assets))
+        return len(assets)
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def deltas(self, start, end=None, user=None, repo=None):
+        """Return downloads of each asset between two times."""
+        with self.lock:
+            rows = self.connection.execute(DELTAS, {
+                'start': start,
+                'end': time.time() if end is None else end,
+                'user': user,
+                'repo': repo
+            }).fetchall()
+        return [Delta(*row) for row in rows]
+
+    # pylint: disable=too-many-arguments
+    def usage(self, start, end=None, period=DAY, user=None, repo=None,
+              by='asset'):
+        """
+        Return downloads of each asset, repo or user (`by`) in each day or
+        week (`period`) from the one containing start to the one
+        containing end, summed from the rollups. Periods without
+        downloads are omitted.
+        """
+        with self.lock:
+            rows = self.connection.execute(USAGE % USAGE_COLUMNS[by], {
+                'period': period,
+                'start': floor(int(start), period),
+                'end': time.time() if end is None else end,
+                'user': user,
+                'repo': repo
+            }).fetchall()
+        return [Usage(*row) for row in rows]
+
+    def record(self, assets, timestamp=None):
+        """Record assets whose count changed, return how many were."""
+        counts = self._counts()
+        return self._write([a for a in assets
+                            if counts.get(a.asset_id) != a.download_count],
+                           timestamp)
+
+    def snapshot(self, assets, timestamp=None):
+        """
+        Yield assets as they are fetched, recording those whose count
+        changed once every asset has been seen.
+        """
+        counts = self._counts()
+        changed = []
+        for asset in assets:
+            if counts.get(asset.asset_id) != asset.download_count:
+                changed.append(asset)
+            yield asset
+        self._write(changed, timestamp)
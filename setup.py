@@ -44,6 +44,12 @@ SETUP_REQUIRES = ['pytest-runner']
 INSTALL_REQUIRES = ['requests']
 TESTS_REQUIRE = ['pytest-cov', 'pytest-pylint', 'requests_mock']
 
+# install concurrent.futures backport if necessary (Python 2.7)
+try:
+    __import__('concurrent.futures')
+except ImportError:
+    INSTALL_REQUIRES.append('futures')
+
 # install standalone mock if necessary (Python 2.7)
 try:
     __import__('unittest.mock')
@@ -64,9 +70,13 @@ setup(
     install_requires=INSTALL_REQUIRES,
     setup_requires=SETUP_REQUIRES,
     tests_require=TESTS_REQUIRE,
-    extras_require={'testing': TESTS_REQUIRE},
+    extras_require={
+        'async': ['aiohttp'],
+        'stream': ['ijson'],
+        'testing': TESTS_REQUIRE
+    },
     entry_points={
-        'console_scripts': ['github-download-count=gdc.gdc:main'],
+        'console_scripts': ['github-download-count=gdc.cli:main'],
     },
     classifiers=[
         'Development Status :: 4 - Beta',
@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark gdc against a local fake GitHub API server.
+
+To run:
+python3 testing/benchmark.py
+python3 testing/benchmark.py --repos 500 --latency 0.05 --jobs 1 8 32
+
+The replay scenario times show replaying an archive recorded from the fake
+server, i.e. aggregation and output without the network. The report
+scenario times --report queries of a history of --history-assets assets
+recorded every 5 minutes for --days (default: a year), --changes of them
+changing each time.
+
+Peak RSS is the high-water mark of the whole process, run a single
+scenario (e.g. --scenario show) to measure it in isolation. The startup
+scenario runs the CLI in fresh interpreters and checks it against
+--budget (or --query-budget for a query answered from the cache, which
+also loads requests). Bytecode should be writable (PYTHONDONTWRITEBYTECODE
+unset) or every run also pays for compiling gdc.
+"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import, print_function
+
+# standard imports
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# external imports
+import requests
+
+# allow the benchmark to be run from a source checkout
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# application imports
+from gdc import gdc  # pylint: disable=wrong-import-position
+from gdc.archive import Archive  # pylint: disable=wrong-import-position
+from gdc.report import show_report  # pylint: disable=wrong-import-position
+from gdc.store import DAY, WEEK, Store  # pylint: disable=wrong-import-position
+
+# test imports
+from fakegithub import FakeGithub  # pylint: disable=wrong-import-position
+
+SCENARIOS = ('connections', 'decode', 'releases', 'replay', 'report',
+             'show', 'startup')
+
+
+def bench_connections(fake, options):
+    """Compare one connection per call against the pooled session."""
+    def unpooled():
+        """Open a new connection for every call (the pre-session path)."""
+        for _ in range(options.calls):
+            requests.get(fake.url + '/user').json()
+
+    def pooled():
+        """Reuse the Github instance's keep-alive session."""
+        github = gdc.Github(api=fake.url)
+        for _ in range(options.calls):
+            github._get('/user')  # pylint: disable=protected-access
+
+    for name, function in (('unpooled', unpooled), ('pooled', pooled)):
+        report(fake, 'connections/%s' % name, function)
+
+
+def bench_decode(fake, options):
+    """
+    Compare the heap used by full and streaming release decoding. The
+    fake server runs in-process, both include its (identical) share.
+    """
+    for stream in (False, True):
+        if stream and gdc._ijson() is None:
+            print('decode/stream skipped (requires ijson)')
+            continue
+        github = gdc.Github(api=fake.url, stream=stream)
+        report(fake, 'decode/%s' % ('stream' if stream else 'json'),
+               lambda g=github: list(g.get_assets_by_repo(fake.user,
+                                                          fake.repos[0])),
+               traced=True)
+
+
+def bench_releases(fake, options):
+    """Time get_releases_by_user for each number of jobs."""
+    for jobs in options.jobs:
+        github = gdc.Github(jobs=jobs, api=fake.url)
+        report(fake, 'releases/jobs=%d' % jobs,
+               lambda g=github: g.get_releases_by_user(fake.user))
+
+
+def bench_replay(fake, options):
+    """
+    Record show's responses once, then time show replaying them, i.e.
+    aggregation and output without the network.
+    """
+    archive = tempfile.mkdtemp()
+    try:
+        github = gdc.Github(api=fake.url, archive=Archive(archive))
+        with discard():
+            github.show(fake.user)
+        github.archive.save()
+
+        for jobs in options.jobs:
+            github = gdc.Github(jobs=jobs, api=fake.url,
+                                archive=Archive(archive, replay=True))
+
+            def function(g=github):
+                """Render to a discarded buffer."""
+                with discard():
+                    g.show(fake.user)
+            report(fake, 'replay/jobs=%d' % jobs, function)
+    finally:
+        shutil.rmtree(archive)
+
+
+def bench_report(fake, options):
+    """
+    Record snapshots every 5 minutes for options.days, then time reports
+    of the last week and of every day and week.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        store = Store(os.path.join(directory, 'history.sqlite3'))
+        # the history is thrown away, do not wait for every write to disk
+        store.connection.execute('PRAGMA synchronous = OFF')
+        counts = [0] * options.history_assets
+        start = time.time()
+        for tick in range(options.days * DAY // 300):
+            changed = []
+            for index in range(tick * options.changes,
+                               (tick + 1) * options.changes):
+                index %= len(counts)
+                counts[index] += 1 + index % 7
+                changed.append(gdc.Asset(
+                    fake.user, fake.repos[index % len(fake.repos)], 'v1',
+                    'asset-%d' % index, counts[index], 1, index))
+            store.record(changed, tick * 300)
+        print('%-28s %8.3fs' % ('report/record', time.time() - start))
+
+        end = options.days * DAY
+        for name, every, since in (('week', None, end - WEEK),
+                                   ('every-day', 'day', 0),
+                                   ('every-week', 'week', 0)):
+            for by in ('asset', 'repo', 'user'):
+                def function(e=every, s=since, b=by):
+                    """Render to a discarded buffer."""
+                    with discard():
+                        show_report(store, s, end, e, b)
+                report(fake, 'report/%s/%s' % (name, by), function)
+        store.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_show(fake, options):
+    """Time show (table and summarized) for each number of jobs."""
+    for jobs in options.jobs:
+        github = gdc.Github(jobs=jobs, api=fake.url)
+        for summarize in (False, True):
+            def function(g=github, s=summarize):
+                """Render to a discarded buffer."""
+                with discard():
+                    g.show(fake.user, summarize=s)
+            report(fake, 'show%s/jobs=%d' % ('/summarize' if summarize
+                                             else '', jobs), function)
+
+
+def bench_startup(fake, options):
+    """
+    Time CLI invocations in fresh interpreters against the budget, then
+    profile the imports of gdc.
+    """
+    cache = tempfile.mkdtemp()
+    query = ['--api', fake.url, '--cache-dir', cache, '-s', fake.user,
+             fake.repos[0]]
+    try:
+        # fill the cache so later queries are answered by 304s
+        cli(query)
+        for name, args, budget in (
+                ('version', ['--version'], options.budget),
+                ('help', ['--help'], options.budget),
+                ('cache-hit', query, options.query_budget)):
+            times = sorted(cli(args) for _ in range(options.runs))
+            median = times[len(times) // 2] * 1000
+            print('%-28s %8.1fms median %8.1fms min   %s (budget %dms)' % (
+                'startup/' + name, median, times[0] * 1000,
+                'ok' if median <= budget else 'OVER', budget))
+    finally:
+        shutil.rmtree(cache)
+
+    # cumulative import times of the modules imported by gdc
+    profile = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c', 'import gdc.cli'],
+        cwd=ROOT, stderr=subprocess.PIPE, universal_newlines=True)
+    modules = []
+    for line in profile.communicate()[1].splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            modules.append((int(parts[1]), parts[2].strip()))
+    for microseconds, module in sorted(modules, reverse=True)[:10]:
+        print('%-28s %8.1fms' % ('import/' + module, microseconds / 1000.0))
+    sys.stdout.flush()
+
+
+def cli(args):
+    """Return the wall time of a CLI invocation in a fresh interpreter."""
+    with open(os.devnull, 'w') as devnull:
+        start = time.time()
+        subprocess.check_call([sys.executable, '-m', 'gdc'] + args,
+                              cwd=ROOT, stdout=devnull)
+        return time.time() - start
+
+
+@contextmanager
+def discard():
+    """Redirect stdout to a buffer that is thrown away."""
+    stdout = sys.stdout
+    sys.stdout = io.StringIO() if sys.version_info[0] > 2 else io.BytesIO()
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+
+
+def peak_rss():
+    """Return the peak resident set size of the process in MiB, or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024 if sys.platform == 'darwin' else 1024.0)
+
+
+def report(fake, name, function, traced=False):
+    """
+    Run function and print its wall time, rate, connections and RSS (or
+    the peak of the Python heap while it ran if traced).
+    """
+    traced = traced and tracemalloc is not None
+    if traced:
+        tracemalloc.start()
+
+    fake.requests = fake.connections = 0
+    start = time.time()
+    function()
+    elapsed = time.time() - start
+
+    if traced:
+        memory = '%.1f MiB heap' % (tracemalloc.get_traced_memory()[1] /
+                                    (1024.0 * 1024))
+        tracemalloc.stop()
+    else:
+        rss = peak_rss()
+        memory = '-' if rss is None else '%.1f MiB' % rss
+
+    print('%-28s %8.3fs %10.1f req/s %6d requests %6d connections %s' % (
+        name, elapsed, fake.requests / elapsed, fake.requests,
+        fake.connections, memory))
+    sys.stdout.flush()
+
+
+def run(fake, options):
+    """Run the selected scenarios against a started fake server."""
+    functions = {
+        'connections': bench_connections,
+        'decode': bench_decode,
+        'releases': bench_releases,
+        'replay': bench_replay,
+        'report': bench_report,
+        'show': bench_show,
+        'startup': bench_startup
+    }
+    for scenario in options.scenario or SCENARIOS:
+        functions[scenario](fake, options)
+
+
+def _parser(args):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark gdc against a local fake GitHub API server.')
+    parser.add_argument(
+        '--scenario',
+        action='append',
+        choices=SCENARIOS,
+        help='run only SCENARIO (repeatable, default: all)')
+    parser.add_argument(
+        '--calls',
+        default=500,
+        help='number of API calls per connections scenario',
+        type=int)
+    parser.add_argument(
+        '--jobs',
+        default=[1, 8],
+        help='numbers of concurrent jobs to benchmark (default: 1 8)',
+        nargs='+',
+        type=int)
+    parser.add_argument(
+        '--repos',
+        default=100,
+        help='number of repositories of the fake user',
+        type=int)
+    parser.add_argument(
+        '--releases',
+        default=5,
+        help='number of releases per repository (the decode scenario '
+        'fetches every page of one repository\'s releases)',
+        type=int)
+    parser.add_argument(
+        '--assets',
+        default=3,
+        help='number of assets per release',
+        type=int)
+    parser.add_argument(
+        '--history-assets',
+        default=1000,
+        help='number of assets of the report scenario\'s history',
+        type=int)
+    parser.add_argument(
+        '--days',
+        default=365,
+        help='number of days of the report scenario\'s history (default: '
+        '365)',
+        type=int)
+    parser.add_argument(
+        '--changes',
+        default=10,
+        help='number of assets changing per snapshot of the report '
+        'scenario\'s history',
+        type=int)
+    parser.add_argument(
+        '--runs',
+        default=10,
+        help='number of CLI invocations per startup measurement',
+        type=int)
+    parser.add_argument(
+        '--budget',
+        default=100,
+        help='startup budget of --version and --help in milliseconds '
+        '(default: 100)',
+        type=int)
+    parser.add_argument(
+        '--query-budget',
+        default=250,
+        help='startup budget of a query answered from the cache in '
+        'milliseconds (default: 250)',
+        type=int)
+    parser.add_argument(
+        '--latency',
+        default=0,
+        help='server latency per request in seconds',
+        type=float)
+    parser.add_argument(
+        '--rate-limit',
+        help='send X-RateLimit-* headers allowing N requests per window',
+        metavar='N',
+        type=int)
+    parser.add_argument(
+        '--window',
+        default=3600,
+        help='rate limit window in seconds (default: 3600)',
+        type=float)
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    """Start benchmark."""
+    options = _parser(args)
+    with FakeGithub(repos=options.repos, releases=options.releases,
+                    assets=options.assets, latency=options.latency,
+                    rate_limit=options.rate_limit,
+                    window=options.window) as fake:
+        run(fake, options)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,12 +10,24 @@ import os
 import socket
 import sys
 
+# external imports
+import pytest
+
+# application imports
+from gdc.archive import Archive
+from gdc.gdc import Github
+
+# test imports
+from fakegithub import FakeGithub
+
 # pytest-pylint
 try:
     from pytest_pylint import PyLintItem
 except ImportError:
     PyLintItem = False
 
+SOCKET = socket.socket
+
 
 def clean_arguments():
     """Prepare command-line args (necessary for tests involving argparse)."""
@@ -23,19 +35,22 @@ def clean_arguments():
 
 
 def clean_environment():
-    """Unset environment variable GITHUB_TOKEN."""
-    try:
-        del os.environ['GITHUB_TOKEN']
-    except KeyError:
-        pass
+    """Unset environment variables GITHUB_TOKEN and GITHUB_TOKENS."""
+    for name in ('GITHUB_TOKEN', 'GITHUB_TOKENS'):
+        try:
+            del os.environ[name]
+        except KeyError:
+            pass
 
 
 def clean_logger():
     """
     Clear any pre-existing root logger configuration so that
-    logging.basicConfig() can be used again.
+    logging.basicConfig() can be used again, and reset its level (which
+    also clears the cached level checks of loggers).
     """
     del logging.root.handlers[:]
+    logging.root.setLevel(logging.WARNING)
 
 
 def disable_socket():
@@ -49,6 +64,11 @@ def disable_socket():
     socket.socket = guard
 
 
+def enable_socket():
+    """Restore socket (for tests against a local fake server)."""
+    socket.socket = SOCKET
+
+
 def pylint_test(item):
     """Determine whether current item is a pylint test."""
     return PyLintItem and isinstance(item, PyLintItem)
@@ -62,3 +82,26 @@ def pytest_runtest_setup(item):
         clean_environment()
         clean_logger()
         disable_socket()
+
+
+@pytest.fixture()
+def fake_github():
+    """Fake GitHub API served on localhost."""
+    enable_socket()
+    with FakeGithub() as fake:
+        yield fake
+
+
+@pytest.fixture()
+def recorded(tmpdir):
+    """
+    Archive of the fake server's responses to a scan of all of its
+    user's releases, replayed with the Internet disabled.
+    """
+    enable_socket()
+    with FakeGithub() as fake:
+        github = Github(api=fake.url, archive=Archive(str(tmpdir)))
+        list(github.get_assets_by_user(fake.user))
+        github.archive.save()
+    disable_socket()
+    return Archive(str(tmpdir), replay=True)
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""Fake GitHub API server for tests and benchmarks."""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import hashlib
+import json
+import re
+import threading
+import time
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlsplit
+
+
+# every setting and statistic of the fake server is an attribute
+# pylint: disable=too-many-instance-attributes
+class FakeGithub(object):
+    """Serve generated users, repos, releases and assets on localhost."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, user='octocat', repos=10, releases=2, assets=3,
+                 latency=0, rate_limit=None, window=3600):
+        self.user = user
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window = window
+        self.remaining = rate_limit
+        self.reset = time.time() + window
+
+        # remaining budget of each token (requests without one spend
+        # self.remaining)
+        self.budgets = {}
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.not_modified = 0
+        self.active = 0
+        self.peak = 0
+        self.server = None
+        self.thread = None
+
+        self.repos = ['repo-%03d' % r for r in range(repos)]
+        self.pushed_at = {}
+
+        # owners that are organizations, and repos by kind (only listed
+        # for their owner by /user/repos and /orgs/:org/repos)
+        self.orgs = set()
+        self.forks = set()
+        self.archived = set()
+        self.private = set()
+
+        # repos whose release requests are dropped without a response
+        self.dropped = set()
+
+        # releases of repos of other owners the user collaborates on, only
+        # listed by GraphQL queries for more than owned repositories
+        self.collaborations = {}
+
+        self.releases = dict(
+            (repo, [self._release(repo, i * releases + r, r, assets)
+                    for r in range(releases)])
+            for i, repo in enumerate(self.repos))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @staticmethod
+    def _release(repo, identifier, number, assets):
+        """Return a release payload with generated assets."""
+        # like GitHub's, most of a release payload is unused by gdc
+        return {
+            'id': identifier,
+            'tag_name': 'v%d' % number,
+            'body': '## Changes\n\n' + '* Fixed a bug.\n' * 100,
+            'author': _user(),
+            'assets': [{
+                'id': identifier * assets + a,
+                'name': '%s-%d.%d.tar.gz' % (repo, number, a),
+                'download_count': number * 10 + a,
+                'uploader': _user()
+            } for a in range(assets)]
+        }
+
+    def count(self, connection=False):
+        """Record a request (or a new connection)."""
+        with self.lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+
+    def delay(self):
+        """Simulate latency, tracking the peak of concurrent requests."""
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def limit(self, spend, token=None):
+        """
+        Return rate limit headers of a token (the Authorization header),
+        spending one request if asked.
+        """
+        with self.lock:
+            now = time.time()
+            if now >= self.reset:
+                self.remaining = self.rate_limit
+                self.budgets = {}
+                self.reset = now + self.window
+
+            remaining = self.remaining if token is None else \
+                self.budgets.get(token, self.rate_limit)
+            if spend and remaining:
+                remaining -= 1
+            if token is None:
+                self.remaining = remaining
+            else:
+                self.budgets[token] = remaining
+
+            return {
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Remaining': str(remaining),
+                'X-RateLimit-Reset': str(int(self.reset))
+            }
+
+    def route(self, path):
+        """Return the JSON payload for a path, or None if unknown."""
+        if path == '/user':
+            return {'login': self.user}
+
+        if path == '/rate_limit':
+            core = {'limit': self.rate_limit, 'remaining': self.remaining,
+                    'reset': int(self.reset)}
+            return {'resources': {'core': core}, 'rate': core}
+
+        match = re.match(r'^/users/([^/]+)$', path)
+        if match:
+            return {'login': match.group(1), 'type': 'Organization'
+                    if match.group(1) in self.orgs else 'User'}
+
+        match = re.match(r'^/users/([^/]+)/repos$', path)
+        if match:
+            return self.listing(match.group(1), private=False)
+
+        match = re.match(r'^/orgs/([^/]+)/repos$', path)
+        if match and match.group(1) in self.orgs:
+            return self.listing(match.group(1), private=True)
+
+        if path == '/user/repos':
+            return self.listing(self.user, private=True)
+
+        match = re.match(r'^/repos/[^/]+/([^/]+)/releases$', path)
+        if match and match.group(1) in self.releases:
+            return self.releases[match.group(1)]
+
+        match = re.match(r'^/repos/[^/]+/([^/]+)/releases/tags/(.+)$', path)
+        if match:
+            for release in self.releases.get(match.group(1), []):
+                if release['tag_name'] == match.group(2):
+                    return release
+
+        return None
+
+    def listing(self, owner, private):
+        """Return the repository listing of an owner."""
+        return [{'full_name': '%s/%s' % (owner, r),
+                 'fork': r in self.forks,
+                 'archived': r in self.archived,
+                 'private': r in self.private,
+                 'pushed_at': self.pushed_at.get(r, '2016-01-01T00:00:00Z')}
+                for r in self.repos if private or r not in self.private]
+
+    def graphql(self, query, variables):
+        """
+        Answer gdc's releases query with a page of repositories, or its
+        query counting the releases of repositories.
+        """
+        if 'after' not in variables:
+            return {'data': dict(
+                ('r%s' % key[len('name'):], {'releases': {
+                    'totalCount': len(self.releases.get(name, []))}})
+                for key, name in variables.items() if key.startswith('name'))}
+
+        repos = self.repos
+        if 'ownerAffiliations: OWNER' not in query:
+            repos = sorted(repos + list(self.collaborations))
+        start = int(variables['after'] or 0)
+        end = start + variables['repos']
+
+        def page(items, first):
+            """Return a connection of the first items."""
+            return {'pageInfo': {'hasNextPage': len(items) > first,
+                                 'endCursor': str(end)},
+                    'nodes': items[:first]}
+
+        nodes = [{
+            'name': repo,
+            'isFork': repo in self.forks,
+            'isArchived': repo in self.archived,
+            'releases': page([{
+                'databaseId': r['id'],
+                'tagName': r['tag_name'],
+                'releaseAssets': page([{
+                    'databaseId': a['id'],
+                    'name': a['name'],
+                    'downloadCount': a['download_count']
+                } for a in r['assets']], variables['assets'])
+            } for r in self.releases.get(repo, self.collaborations.get(
+                repo))], variables['releases'])
+        } for repo in repos[start:end]]
+
+        repositories = page(nodes, variables['repos'])
+        repositories['pageInfo']['hasNextPage'] = end < len(repos)
+        return {'data': {'repositoryOwner': {'repositories': repositories}}}
+
+    @property
+    def url(self):
+        """Return the base URL of the running server."""
+        return 'http://%s:%d' % self.server.server_address[:2]
+
+    def start(self):
+        """Start serving on an ephemeral localhost port."""
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.fake = self
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={'poll_interval': 0.01})
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+def _user():
+    """Return a user object like those embedded in release payloads."""
+    user = dict(('%s_url' % key, 'https://api.github.com/users/octocat/' +
+                 key) for key in ('followers', 'following', 'gists',
+                                  'starred', 'subscriptions',
+                                  'organizations', 'repos', 'events',
+                                  'received_events'))
+    user.update(login='octocat', id=1, type='User', site_admin=False)
+    return user
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server."""
+    daemon_threads = True
+    fake = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Answer GitHub API requests from the FakeGithub instance."""
+
+    # HTTP/1.1 is required for keep-alive
+    protocol_version = 'HTTP/1.1'
+
+    # headers and body are written separately, avoid delayed ACK stalls
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.fake.count(connection=True)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Respond to a GET request."""
+        fake = self.server.fake
+        fake.count()
+
+        fake.delay()
+
+        if self.limited():
+            return
+
+        url = urlsplit(self.path)
+        if fake.dropped and re.match(r'^/repos/[^/]+/(%s)/releases' % '|'.join(
+                re.escape(r) for r in fake.dropped), url.path):
+            self.close_connection = True
+            return
+
+        payload = fake.route(url.path)
+        if payload is None:
+            self.respond(404, {
+                'message': 'Not Found',
+                'documentation_url': 'https://developer.github.com/v3'
+            })
+        elif isinstance(payload, list):
+            self.respond_page(url, payload)
+        else:
+            self.respond(200, payload)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Respond to a GraphQL request."""
+        fake = self.server.fake
+        fake.count()
+
+        fake.delay()
+
+        if self.limited():
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length).decode('utf8'))
+        if self.path == '/graphql':
+            self.respond(200, fake.graphql(request['query'],
+                                           request['variables']))
+        else:
+            self.respond(404, {'message': 'Not Found'})
+
+    def limited(self):
+        """Send a 403 if the rate limit is exhausted."""
+        fake = self.server.fake
+        if fake.rate_limit is None or fake.limit(
+                False, self.headers.get('Authorization'))[
+                    'X-RateLimit-Remaining'] != '0':
+            return False
+
+        self.respond(403, {
+            'message': 'API rate limit exceeded',
+            'documentation_url': 'https://developer.github.com/v3'
+        })
+        return True
+
+    def respond(self, status, payload, headers=None):
+        """Send a JSON response (or 304 if the client's ETag matches)."""
+        fake = self.server.fake
+        body = json.dumps(payload).encode('utf8')
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        headers = dict(headers or {})
+
+        # like GitHub, 304s and rate limit checks are free
+        modified = self.headers.get('If-None-Match') != etag
+        if fake.rate_limit is not None:
+            headers.update(fake.limit(
+                modified and status != 403 and
+                not self.path.startswith('/rate_limit'),
+                self.headers.get('Authorization')))
+
+        if status == 200 and not modified:
+            with fake.lock:
+                fake.not_modified += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond_page(self, url, items):
+        """Send one page of a list with a Link header like GitHub's."""
+        query = parse_qs(url.query)
+        per_page = int(query.get('per_page', ['30'])[0])
+        page = int(query.get('page', ['1'])[0])
+
+        def link(number, rel):
+            """Return a link to another page."""
+            return '<http://%s:%d%s?per_page=%d&page=%d>; rel="%s"' % (
+                self.server.server_address[:2] +
+                (url.path, per_page, number, rel))
+
+        headers = {}
+        if page * per_page < len(items):
+            headers['Link'] = ', '.join((
+                link(page + 1, 'next'),
+                link(-(-len(items) // per_page), 'last')))
+
+        self.respond(200, items[(page - 1) * per_page:page * per_page],
+                     headers)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Silence request logging."""
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for aio.py"""
+
+# standard imports
+import asyncio
+import time
+
+# external imports
+import pytest
+
+# application imports
+from gdc import gdc
+
+aio = pytest.importorskip('gdc.aio')
+
+
+####################
+# HELPER FUNCTIONS #
+####################
+
+def run(fake, method, *args, **kwargs):
+    """Call an AsyncGithub method against the fake server."""
+    async def call():
+        """Await the method and close the client."""
+        async with aio.AsyncGithub(api=fake.url, **kwargs) as github:
+            return await getattr(github, method)(*args)
+    return asyncio.run(call())
+
+
+def capped(sleep):
+    """Return asyncio.sleep with delays capped for fast tests."""
+    async def wrapper(delay, *args, **kwargs):
+        """Sleep at most a tenth of a second."""
+        await sleep(min(delay, 0.1), *args, **kwargs)
+    return wrapper
+
+
+###############
+# CLASS TESTS #
+###############
+
+class TestAsyncGithub:
+    """Test AsyncGithub against the fake server."""
+
+    def test_init_with_token(self, monkeypatch):
+        """Test for authorization token (GITHUB_TOKEN set)."""
+        monkeypatch.setenv('GITHUB_TOKEN', 'abc')
+
+        assert aio.AsyncGithub().headers == {'Authorization': 'token abc'}
+
+    def test_init_with_tokens(self, monkeypatch):
+        """Test several tokens (GITHUB_TOKENS set) are pooled."""
+        monkeypatch.setenv('GITHUB_TOKENS', 'abc,def')
+        github = aio.AsyncGithub()
+
+        assert github.headers == {'Authorization': 'token abc'}
+        assert [t for t, _ in github.pool.tokens] == ['abc', 'def']
+
+    def test_token_pool(self, fake_github):
+        """Test a rate limited request is retried at once with another."""
+        fake_github.rate_limit = 5
+        fake_github.budgets['token a'] = 0
+
+        assert run(fake_github, 'get_user', tokens=['a', 'b']) == 'octocat'
+        assert fake_github.budgets['token b'] == 4
+
+    @pytest.mark.parametrize('method,args', [
+        ('get_counts', ('octocat',)),
+        ('get_counts', ('octocat', 'repo-001')),
+        ('get_counts', ('octocat', 'repo-001', 'v1')),
+        ('get_releases_by_repo', ('octocat', 'repo-002')),
+        ('get_releases_by_tag', ('octocat', 'repo-002', 'v0')),
+        ('get_releases_by_user', ('octocat',)),
+        ('get_user', ())
+    ])
+    @pytest.mark.parametrize('token', [None, 'abc'])
+    def test_parity(self, fake_github, monkeypatch, method, args, token):
+        """Test results match the synchronous client."""
+        # only listed for the authenticated owner
+        fake_github.private.add('repo-003')
+        if token:
+            monkeypatch.setenv('GITHUB_TOKEN', token)
+        expected = getattr(gdc.Github(api=fake_github.url), method)(*args)
+
+        assert run(fake_github, method, *args) == expected
+
+    @pytest.mark.parametrize('owner', ['octocat', 'github'])
+    def test_repos_parity(self, fake_github, monkeypatch, owner):
+        """Test repos are listed and skipped like the synchronous client."""
+        monkeypatch.setenv('GITHUB_TOKEN', 'abc')
+        fake_github.orgs.add('github')
+        fake_github.private.add('repo-003')
+        fake_github.forks.add('repo-004')
+        fake_github.archived.add('repo-005')
+        kwargs = {'skip_forks': True, 'skip_archived': True}
+        expected = list(gdc.Github(api=fake_github.url, **kwargs)
+                        .get_repos_by_user(owner))
+
+        assert run(fake_github, 'get_repos_by_user', owner,
+                   **kwargs) == expected
+        assert 'repo-003' in expected and 'repo-004' not in expected
+
+    def test_paginate(self, fake_github):
+        """Test pagination follows Link headers."""
+        fake_github.repos = ['repo-%03d' % r for r in range(250)]
+
+        repos = run(fake_github, 'get_repos_by_user', 'octocat')
+
+        assert repos == fake_github.repos and fake_github.requests == 3
+
+    def test_concurrency(self, fake_github):
+        """Test in-flight requests are bounded by concurrency."""
+        fake_github.latency = 0.02
+
+        releases = run(fake_github, 'get_releases_by_user', 'octocat',
+                       concurrency=4)
+
+        assert len(releases) == 10
+        assert 1 < fake_github.peak <= 4
+
+    def test_error(self, fake_github):
+        """Test API errors are raised as GithubError."""
+        with pytest.raises(gdc.GithubError, match='Not Found'):
+            run(fake_github, 'get_releases_by_tag', 'octocat', 'nope', 'v0')
+
+    def test_retry(self, fake_github, monkeypatch):
+        """Test a rate limited request is retried once the window resets."""
+        fake_github.rate_limit = 10
+        fake_github.remaining = 0
+        fake_github.reset = time.time() + 0.2
+        monkeypatch.setattr(asyncio, 'sleep', capped(asyncio.sleep))
+
+        assert run(fake_github, 'get_releases_by_repo', 'octocat',
+                   'repo-000') == [('repo-000-0.0.tar.gz', 0),
+                                   ('repo-000-0.1.tar.gz', 1),
+                                   ('repo-000-0.2.tar.gz', 2),
+                                   ('repo-000-1.0.tar.gz', 10),
+                                   ('repo-000-1.1.tar.gz', 11),
+                                   ('repo-000-1.2.tar.gz', 12)]
+        assert fake_github.requests > 1
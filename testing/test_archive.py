@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for archive.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import os
+
+# external imports
+import pytest
+import requests_mock
+
+# application imports
+from gdc import cli, gdc
+from gdc.archive import Archive
+
+
+class TestArchive:
+    """Test Archive class."""
+
+    def test_key(self):
+        """Test requests are keyed regardless of host, by body digest."""
+        assert Archive.key('GET', 'https://api.github.com/users/a/repos'
+                           '?per_page=100') == \
+            Archive.key('GET', 'http://127.0.0.1:8000/users/a/repos'
+                        '?per_page=100') == 'GET /users/a/repos?per_page=100'
+        assert Archive.key('POST', '/graphql', {'query': 'a'}) != \
+            Archive.key('POST', '/graphql', {'query': 'b'})
+
+    def test_store(self, tmpdir):
+        """Test a response is replaced by a later recording."""
+        url = 'https://api.github.com/user'
+        archive = Archive(str(tmpdir))
+
+        with requests_mock.Mocker() as mock:
+            mock.get(url, text='{"login":"a"}', headers={'ETag': '"1"'})
+            gdc.Github(archive=archive)._get('/user')
+            mock.get(url, text='{"login":"b"}', status_code=404)
+            gdc.Github(archive=archive)._get('/user')
+        archive.save()
+
+        response = Archive(str(tmpdir), replay=True).load('GET', url)
+        assert (response.status_code, response.json()) == (404, {'login': 'b'})
+        assert len(archive.index) == 1 and \
+            sorted(os.listdir(str(tmpdir))) == ['index.json',
+                                                'responses.jsonl']
+
+    def test_replay(self, recorded):
+        """Test a recorded scan is replayed without the Internet."""
+        github = gdc.Github(api='https://github.invalid', archive=recorded)
+
+        assert len(github.get_releases_by_user('octocat')) == 10
+
+    def test_replay_with_hooks(self, recorded):
+        """Test replayed responses are reported to hooks."""
+        calls = []
+        github = gdc.Github(archive=recorded, hooks=[calls.append])
+        github.get_releases_by_repo('octocat', 'repo-000')
+
+        assert [(c.template, c.status, c.latency) for c in calls] == \
+            [('/repos/:owner/:repo/releases', 200, 0)]
+
+    def test_replay_not_recorded(self, recorded):
+        """Test requests that were not recorded fail."""
+        with pytest.raises(gdc.GithubError) as exception:
+            gdc.Github(archive=recorded).get_user()
+
+        assert str(exception.value) == \
+            'GET https://api.github.com/user was not recorded'
+
+    def test_replay_missing(self, tmpdir):
+        """Test a missing archive cannot be replayed."""
+        with pytest.raises(IOError):
+            Archive(str(tmpdir.join('missing')), replay=True)
+
+
+def test_main_record_replay(capfd, fake_github, tmpdir):
+    """Test main replays output recorded by an earlier run."""
+    cli.main(['--api', fake_github.url, '--record', str(tmpdir), '-s',
+              'octocat'])
+    recorded = capfd.readouterr()[0]
+    requests = fake_github.requests
+
+    cli.main(['--api', fake_github.url, '--replay', str(tmpdir), '-s',
+              'octocat'])
+
+    assert capfd.readouterr()[0] == recorded and \
+        fake_github.requests == requests
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for benchmark.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# test imports
+import benchmark
+
+
+def test_run(capfd, fake_github):
+    """Test every scenario reports its timings."""
+    benchmark.run(fake_github, benchmark._parser(['--calls', '3',
+                                                  '--jobs', '1', '4',
+                                                  '--runs', '1',
+                                                  '--days', '2']))
+
+    names = [line.split()[0] for line in
+             capfd.readouterr()[0].splitlines()
+             if not line.startswith('import/')]
+    assert names == ['connections/unpooled', 'connections/pooled',
+                     'decode/json', 'decode/stream', 'releases/jobs=1',
+                     'releases/jobs=4', 'replay/jobs=1', 'replay/jobs=4',
+                     'report/record', 'report/week/asset',
+                     'report/week/repo', 'report/week/user',
+                     'report/every-day/asset', 'report/every-day/repo',
+                     'report/every-day/user', 'report/every-week/asset',
+                     'report/every-week/repo', 'report/every-week/user',
+                     'show/jobs=1',
+                     'show/summarize/jobs=1', 'show/jobs=4',
+                     'show/summarize/jobs=4', 'startup/version',
+                     'startup/help', 'startup/cache-hit']
+
+
+def test_run_scenario(capfd, fake_github):
+    """Test a single scenario reports requests and peak RSS."""
+    benchmark.run(fake_github, benchmark._parser(['--scenario', 'releases',
+                                                  '--jobs', '2']))
+
+    line = capfd.readouterr()[0]
+    assert line.startswith('releases/jobs=2 ')
+    assert ' 11 requests ' in line and line.endswith(' MiB\n')
+
+
+def test_parser():
+    """Test fake server settings are parsed."""
+    options = benchmark._parser(['--repos', '5', '--releases', '2',
+                                 '--assets', '1', '--rate-limit', '100'])
+
+    assert (options.repos, options.releases, options.assets,
+            options.rate_limit, options.jobs) == (5, 2, 1, 100, [1, 8])
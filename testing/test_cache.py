@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for cache.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import os
+import time
+
+# external imports
+import pytest
+import requests_mock
+
+# application imports
+from gdc import gdc
+from gdc.cache import Cache, default_path
+
+
+class TestCache:
+    """Test Cache class."""
+
+    def test_default_path(self, monkeypatch):
+        """Test default_path honours XDG_CACHE_HOME."""
+        monkeypatch.setenv('XDG_CACHE_HOME', '/xdg')
+
+        assert default_path() == '/xdg/github-download-count'
+
+    def test_key_depends_on_token(self):
+        """Test responses are cached per credential."""
+        url = 'https://api.github.com/user'
+
+        assert Cache.key(url, {}) != \
+            Cache.key(url, {'Authorization': 'token 666'})
+
+    def test_conditional_request(self, cache):
+        """Test a 304 response is served from the cache."""
+        url = 'https://api.github.com/repos/brbsix/debtool/releases'
+        headers = {'ETag': '"abc"', 'Link': '<%s?page=2>; rel="next"' % url}
+
+        with requests_mock.Mocker() as mock:
+            mock.get(url, text='[1]', headers=headers)
+            first = gdc.Github(cache=cache)._fetch(url)
+
+            mock.get(url, status_code=304, headers={'ETag': '"abc"'})
+            second = gdc.Github(cache=cache)._fetch(url)
+
+            assert mock.request_history[1].headers['If-None-Match'] == \
+                '"abc"'
+
+        assert first.json() == second.json() == [1] and \
+            second.links == first.links
+
+    def test_without_validator(self, cache):
+        """Test responses without ETag or Last-Modified are not cached."""
+        with requests_mock.Mocker() as mock:
+            mock.get('https://api.github.com/user', text='{}')
+            gdc.Github(cache=cache)._fetch('/user')
+
+        assert os.listdir(cache.path) == []
+
+    def test_evict_expired(self, cache):
+        """Test entries older than the TTL are evicted."""
+        with requests_mock.Mocker() as mock:
+            mock.get('https://api.github.com/user', text='{}',
+                     headers={'ETag': '"abc"'})
+            gdc.Github(cache=cache)._fetch('/user')
+
+        key = cache.key('https://api.github.com/user', {})
+        old = time.time() - cache.ttl - 1
+        os.utime(cache._file(key), (old, old))
+        cache.evict()
+
+        assert cache.load(key) is None and os.listdir(cache.path) == []
+
+    def test_evict_oversized(self, tmpdir):
+        """Test the oldest entries are evicted beyond max_size."""
+        cache = Cache(str(tmpdir), max_size=1024)
+        body = '"%s"' % ('x' * 400)
+
+        with requests_mock.Mocker() as mock:
+            for number in range(5):
+                url = 'https://api.github.com/repos/brbsix/%d' % number
+                mock.get(url, text=body, headers={'ETag': '"%d"' % number})
+                gdc.Github(cache=cache)._fetch(url)
+
+        assert cache.size <= 1024 and \
+            cache.load(cache.key(url, {})) is not None
+
+    def test_value(self, cache):
+        """Test values are cached apart from responses until expired."""
+        key = cache.key('https://api.github.com/repos/a/b/releases#empty',
+                        {})
+        cache.store_value(key, '2016-01-01T00:00:00Z')
+
+        assert cache.load_value(key) == '2016-01-01T00:00:00Z' and \
+            cache.load(key) is None
+
+        old = time.time() - cache.ttl - 1
+        os.utime(cache._file(key), (old, old))
+        assert cache.load_value(key) is None
+
+    def test_fake_server(self, cache, fake_github):
+        """Test a second run is answered with 304s."""
+        for _ in range(2):
+            github = gdc.Github(api=fake_github.url, cache=cache)
+            releases = github.get_releases_by_user('octocat')
+
+        assert len(releases) == 10 and fake_github.not_modified == 11
+
+
+#################
+# TEST FIXTURES #
+#################
+
+@pytest.fixture()
+def cache(tmpdir):
+    """Empty cache in a temporary directory."""
+    return Cache(str(tmpdir))
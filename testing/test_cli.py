@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for cli.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import argparse
+import os
+import subprocess
+import sys
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+# external imports
+import pytest
+import requests
+import requests_mock
+
+# application imports
+from gdc import cli, gdc
+from gdc.store import DAY, Store
+
+
+##################
+# FUNCTION TESTS #
+##################
+
+class TestParser:
+    """Test _parser function."""
+
+    def test_parser(self):
+        """Test _parser with no arguments."""
+        namespace = options()
+
+        assert cli._parser(None) == namespace and cli._parser([]) == namespace
+
+    def test_parser_summarize(self):
+        """Test _parser with -s/--summarize."""
+        namespace = options(summarize=True)
+
+        for flag in ('-s', '--summarize'):
+            assert cli._parser([flag]) == namespace
+
+    def test_parser_jobs(self):
+        """Test _parser with -j/--jobs."""
+        namespace = options(jobs=8, user='nobody')
+
+        for flag in ('-j', '--jobs'):
+            assert cli._parser([flag, '8', 'nobody']) == namespace
+
+    def test_parser_backend(self):
+        """Test _parser with --backend."""
+        assert cli._parser(['--backend', 'graphql']) == \
+            options(backend='graphql')
+
+    def test_parser_api(self):
+        """Test _parser with --api."""
+        assert cli._parser(['--api', 'https://github.example.com/api/v3']) \
+            == options(api='https://github.example.com/api/v3')
+
+    def test_parser_cache(self):
+        """Test _parser with --cache-dir and --no-cache."""
+        assert cli._parser(['--cache-dir', '/tmp/gdc']) == \
+            options(cache_dir='/tmp/gdc')
+        assert cli._parser(['--no-cache']) == options(no_cache=True)
+
+    def test_parser_selection(self):
+        """Test _parser with --top, --min-downloads and --sort."""
+        assert cli._parser(['--top', '20', '--min-downloads', '100',
+                            '--sort', 'name']) == \
+            options(min_downloads=100, sort='name', top=20)
+
+    def test_parser_matching(self):
+        """Test _parser with --include, --exclude and --group-by."""
+        assert cli._parser(['--include', '*.deb', '--include', 're:x64',
+                            '--exclude', '*.sig', '--group-by',
+                            'pattern']) == \
+            options(exclude=['*.sig'], group_by='pattern',
+                    include=['*.deb', 're:x64'])
+
+    def test_parser_skip(self):
+        """Test _parser with --skip-forks and --skip-archived."""
+        assert cli._parser(['--skip-forks', '--skip-archived', 'a,b']) == \
+            options(skip_archived=True, skip_forks=True, user='a,b')
+
+    def test_parser_invalid_pattern(self, capfd):
+        """Test _parser rejects an invalid regular expression."""
+        with pytest.raises(SystemExit):
+            cli._parser(['--include', 're:(', 'nobody'])
+
+        assert "invalid pattern 're:('" in capfd.readouterr()[1]
+
+    def test_parser_group_by_pattern_without_include(self, capfd):
+        """Test _parser rejects --group-by pattern without --include."""
+        with pytest.raises(SystemExit):
+            cli._parser(['--group-by', 'pattern'])
+
+        assert '--group-by pattern requires --include' in \
+            capfd.readouterr()[1]
+
+    def test_parser_targets(self, tmpdir):
+        """Test _parser with -t/--targets."""
+        path = tmpdir.join('targets')
+        path.write('brbsix\n')
+
+        for flag in ('-t', '--targets'):
+            assert cli._parser([flag, str(path)]).targets.read() == \
+                'brbsix\n'
+
+    def test_parser_tokens(self, tmpdir):
+        """Test _parser with --tokens."""
+        path = tmpdir.join('tokens')
+        path.write('abc\n')
+
+        assert cli._parser(['--tokens', str(path)]).tokens.read() == 'abc\n'
+
+    def test_parser_format(self):
+        """Test _parser with -f/--format."""
+        for flag in ('-f', '--format'):
+            for output in ('csv', 'jsonl', 'table'):
+                assert cli._parser([flag, output]) == options(format=output)
+
+    def test_parser_history(self):
+        """Test _parser with --history."""
+        assert cli._parser(['--history']) == options(history='')
+        assert cli._parser(['--history', 'gdc.sqlite3']) == \
+            options(history='gdc.sqlite3')
+
+    def test_parser_incremental(self):
+        """Test _parser with -i/--incremental and --max-age."""
+        for flag in ('-i', '--incremental'):
+            assert cli._parser([flag]) == options(incremental='')
+        assert cli._parser(['-i', 'repos.json', '--max-age', '60']) == \
+            options(incremental='repos.json', max_age=60)
+
+    def test_parser_serve(self):
+        """Test _parser with --serve and --interval."""
+        assert cli._parser(['--serve', '9184']) == options(serve=('', 9184))
+        assert cli._parser(['--serve', '127.0.0.1:80', '--interval', '60']) \
+            == options(interval=60, serve=('127.0.0.1', 80))
+
+    def test_parser_serve_invalid(self, capfd):
+        """Test _parser rejects --serve without a port."""
+        with pytest.raises(SystemExit):
+            cli._parser(['--serve', 'localhost'])
+
+        assert 'invalid port' in capfd.readouterr()[1]
+
+    def test_parser_stream(self):
+        """Test _parser with --stream."""
+        assert cli._parser(['--stream']) == options(stream=True)
+
+    def test_parser_record(self):
+        """Test _parser with --record and --replay."""
+        assert cli._parser(['--record', 'dir']) == options(record='dir')
+        assert cli._parser(['--replay', 'dir']) == options(replay='dir')
+
+        with pytest.raises(SystemExit):
+            cli._parser(['--record', 'a', '--replay', 'b'])
+
+    def test_parser_report(self):
+        """Test _parser with --report, --since, --until, --every and --by."""
+        assert cli._parser(['--report']) == options(report=True)
+        assert cli._parser([
+            '--report', '--since', '1970-01-02', '--until',
+            '1970-01-03T12:00:00', '--every', 'week', '--by', 'asset'
+        ]) == options(by='asset', every='week', report=True, since=DAY,
+                      until=DAY * 5 // 2)
+
+    def test_parser_since_duration(self):
+        """Test _parser with --since a duration before now."""
+        with patch('time.time', return_value=4 * 7 * DAY):
+            for since, ago in (('12h', DAY // 2), ('2d', 2 * DAY),
+                               ('3w', 21 * DAY)):
+                assert cli._parser(['--since', since]).since == \
+                    4 * 7 * DAY - ago
+
+    def test_parser_since_invalid(self, capfd):
+        """Test _parser rejects --since that is not a time."""
+        with pytest.raises(SystemExit):
+            cli._parser(['--since', 'yesterday'])
+
+        assert "invalid time: 'yesterday'" in capfd.readouterr()[1]
+
+    def test_parser_resume(self):
+        """Test _parser with --resume."""
+        assert cli._parser(['--resume']) == options(resume='')
+        assert cli._parser(['--resume', 'file']) == options(resume='file')
+
+    def test_parser_stats(self):
+        """Test _parser with --stats."""
+        assert cli._parser(['--stats']) == options(stats=True)
+
+    def test_parser_verbose(self):
+        """Test _parser with -v/--verbose."""
+        for flag in ('-v', '--verbose'):
+            assert cli._parser([flag]) == options(verbose=True)
+
+    def test_parser_with_user(self):
+        """Test _parser with USER."""
+        namespace = options(user='nobody')
+
+        assert cli._parser(['nobody']) == namespace
+
+    def test_parser_with_repo(self):
+        """Test _parser with repo."""
+        namespace = options(repo='nowhere', user='nobody')
+
+        assert cli._parser(['nobody', 'nowhere']) == namespace
+
+    def test_parser_with_tag(self):
+        """Test _parser with tag."""
+        namespace = options(repo='nowhere', tag='nothing', user='nobody')
+
+        assert cli._parser(['nobody', 'nowhere', 'nothing']) == namespace
+
+
+def test_main_with_error(capfd):
+    """Test main function reports API errors and exits."""
+    text = (
+        '{"message":"Not Found"'
+        ',"documentation_url":"https://developer.github.com/v3"}'
+    )
+
+    with requests_mock.Mocker() as mock:
+        mock.get('https://api.github.com/users/nobody/repos', text=text)
+
+        with pytest.raises(SystemExit) as exception:
+            cli.main(['--no-cache', 'nobody'])
+
+    # ensure stderr and exit status are as expected
+    assert capfd.readouterr()[1] == 'ERROR: Not Found\n' and \
+        exception.value.code == 1
+
+
+def test_main_with_failed_repos(capfd, fake_github):
+    """Test main function reports failed repos after the others."""
+    del fake_github.releases['repo-003']
+
+    with pytest.raises(SystemExit) as exception:
+        cli.main(['--api', fake_github.url, '--no-cache', '-s', 'octocat'])
+
+    stdout, stderr = capfd.readouterr()
+    assert stdout.count('\n') == 9 and exception.value.code == 1
+    assert stderr == 'ERROR: octocat/repo-003: Not Found\n' \
+        'ERROR: 1 repositories failed: octocat/repo-003\n'
+
+
+def test_main_with_stats(capfd):
+    """Test main function prints a summary of API calls."""
+    with requests_mock.Mocker() as mock:
+        mock.get('https://api.github.com/users/nobody/repos', text='[]')
+        cli.main(['--no-cache', '--stats', 'nobody'])
+
+    stderr = capfd.readouterr()[1].splitlines()
+    assert stderr[0] == '1 requests, 0 retries, 2 bytes, 0 cache hits, ' \
+        '0 cache misses, 0 avoided'
+    assert stderr[2].startswith('GET /users/:user/repos ')
+
+
+def test_main_with_stream(capfd, fake_github, tmpdir):
+    """Test main function streams release listings despite the cache."""
+    request = requests.Session.request
+
+    def send(session, method, url, **kwargs):
+        """Record whether release listings are streamed."""
+        if '/releases' in url:
+            streams.append(kwargs.get('stream', False))
+        return request(session, method, url, **kwargs)
+
+    streams = []
+    with patch('requests.Session.request', send):
+        cli.main(['--api', fake_github.url, '--cache-dir', str(tmpdir),
+                  '--stream', '-s', 'octocat'])
+
+    assert capfd.readouterr()[0].count('\n') == 10
+    assert streams == [True] * 10 and tmpdir.listdir() == []
+
+
+def test_main_with_report(capfd, tmpdir):
+    """Test main function reports downloads from history."""
+    path = str(tmpdir.join('history.sqlite3'))
+    store = Store(path)
+    store.record([gdc.Asset('octocat', 'repo', 'v1', 'a.zip', 5, 1, 1)],
+                 DAY)
+    store.record([gdc.Asset('octocat', 'repo', 'v1', 'a.zip', 12, 1, 1)],
+                 2 * DAY)
+    store.close()
+
+    cli.main(['--history', path, '--report', '--since', '1970-01-01',
+              '--until', '1970-01-08', '-f', 'csv'])
+
+    assert capfd.readouterr()[0] == 'start,user,repo,downloads,rate\n' \
+        '1970-01-01T00:00:00Z,octocat,repo,7,1.0\n'
+
+
+def test_import_is_lazy():
+    """Test heavy dependencies are not loaded until they are needed."""
+    code = ('import sys, gdc.cli; print(sorted(set(sys.modules) & '
+            'set(["ijson", "requests", "sqlite3"])))')
+    output = subprocess.check_output(
+        [sys.executable, '-c', code], universal_newlines=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert output == '[]\n'
+
+
+def test_read_targets():
+    """Test read_targets function."""
+    lines = ['brbsix\n', '\n', '# comment\n', 'brbsix/debtool\n',
+             'brbsix/debtool/release/1.0\n']
+
+    assert list(cli.read_targets(lines)) == [
+        ('brbsix', None, None),
+        ('brbsix', 'debtool', None),
+        ('brbsix', 'debtool', 'release/1.0')
+    ]
+
+
+####################
+# HELPER FUNCTIONS #
+####################
+
+def options(**kwargs):
+    """Return the namespace _parser produces, updated with kwargs."""
+    defaults = dict(api='https://api.github.com', backend='rest', by='repo',
+                    cache_dir=None, every=None, exclude=None, format='table',
+                    group_by=None, history=None, include=None,
+                    incremental=None, interval=300, jobs=1,
+                    max_age=86400, min_downloads=None, no_cache=False,
+                    record=None, replay=None, report=False, repo=None,
+                    resume=None, serve=None, since=None,
+                    skip_archived=False, skip_forks=False, sort=None,
+                    stats=False, stream=False, summarize=False, tag=None,
+                    targets=None, tokens=None, top=None, until=None,
+                    user=None, verbose=False)
+    defaults.update(kwargs)
+    return argparse.Namespace(**defaults)
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for exporter.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import threading
+import time
+
+# external imports
+import pytest
+import requests
+
+# application imports
+from gdc import gdc
+from gdc.exporter import Exporter, escape, render
+
+
+class TestRender:
+    """Test render function."""
+
+    def test_escape(self):
+        """Test label values are escaped."""
+        assert escape('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+
+    def test_render(self):
+        """Test per-asset and per-repo gauges."""
+        assets = [gdc.Asset('octocat', 'repo', 'v1', 'a.zip', 5, 1, 1),
+                  gdc.Asset('octocat', 'repo', 'v2', 'b.zip', 7, 2, 2)]
+
+        lines = render(assets, 100.5, 2).decode('utf8').splitlines()
+
+        assert 'github_release_asset_downloads{user="octocat",repo="repo",' \
+            'tag="v1",asset="a.zip"} 5' in lines
+        assert 'github_repo_downloads{user="octocat",repo="repo"} 12' in lines
+        assert 'github_download_count_refresh_timestamp_seconds 100.5' in \
+            lines
+        assert 'github_download_count_refresh_failures_total 2' in lines
+        assert '# TYPE github_repo_downloads gauge' in lines
+
+
+class TestExporter:
+    """Test Exporter class."""
+
+    def test_refresh(self, fake_github):
+        """Test a refresh renders every target, overlaps only once."""
+        exporter = Exporter(gdc.Github(api=fake_github.url),
+                            [('octocat', None, None),
+                             ('octocat', 'repo-001', 'v1')])
+        exporter.refresh()
+
+        assert exporter.body.count(
+            b'github_release_asset_downloads{') == 60
+        assert exporter.body.count(b'github_repo_downloads{') == 10
+
+    def test_refresh_failure(self, fake_github):
+        """Test a failed target keeps its previous snapshot."""
+        exporter = Exporter(gdc.Github(api=fake_github.url),
+                            [('octocat', 'repo-001', None)])
+        exporter.refresh()
+        fake_github.releases = {}
+        exporter.refresh()
+
+        assert exporter.body.count(
+            b'github_release_asset_downloads{') == 6
+        assert b'github_download_count_refresh_failures_total 1' in \
+            exporter.body
+
+    def test_refresh_connection_error(self, fake_github):
+        """Test a dropped connection only fails its own target."""
+        fake_github.dropped.add('repo-001')
+        exporter = Exporter(gdc.Github(api=fake_github.url, retries=0),
+                            [('octocat', 'repo-001', None),
+                             ('octocat', 'repo-002', None)])
+        exporter.refresh()
+
+        assert exporter.body.count(
+            b'github_release_asset_downloads{') == 6
+        assert b'github_download_count_refresh_failures_total 1' in \
+            exporter.body
+
+    def test_scrape(self, fake_github, server):
+        """Test scrapes serve the snapshot without calling GitHub."""
+        exporter, url = server(fake_github, [('octocat', 'repo-001', None)])
+        requests_before = fake_github.requests
+
+        for _ in range(3):
+            response = requests.get(url + '/metrics')
+            assert response.status_code == 200
+            assert response.content == exporter.body
+        assert response.headers['Content-Type'].startswith('text/plain')
+        assert fake_github.requests == requests_before
+
+    def test_scrape_not_found(self, fake_github, server):
+        """Test paths other than /metrics are not found."""
+        _, url = server(fake_github, [])
+
+        assert requests.get(url + '/').status_code == 404
+
+
+#################
+# TEST FIXTURES #
+#################
+
+@pytest.fixture()
+def server():
+    """Return a factory of running exporters and their URLs."""
+    exporters = []
+
+    def start(fake, targets):
+        """Serve targets of the fake server once refreshed."""
+        exporter = Exporter(gdc.Github(api=fake.url), targets, 3600)
+        address = exporter.start('127.0.0.1', 0)
+        exporters.append(exporter)
+
+        thread = threading.Thread(target=exporter.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        while b'\ngithub_download_count_refresh_timestamp_seconds ' not in \
+                exporter.body:
+            time.sleep(0.01)
+        return exporter, 'http://%s:%d' % address
+
+    yield start
+
+    for exporter in exporters:
+        exporter.server.shutdown()
+        exporter.stop()
@@ -6,7 +6,6 @@
 from __future__ import absolute_import
 
 # standard imports
-import argparse
 import hashlib
 import io
 import json
@@ -19,10 +18,13 @@ except ImportError:
 
 # external imports
 import pytest
+import requests
 import requests_mock
 
 # application imports
 from gdc import gdc
+from gdc.cache import Cache
+from gdc.graphql import GithubGraphQL
 
 
 ###############
@@ -47,6 +49,23 @@ class TestGithubInit:
         """Test for empty authorization token (GITHUB_TOKEN set empty)."""
         assert gdc.Github().headers == {}
 
+    def test_init_with_tokens(self, monkeypatch, token_valid):
+        """Test several tokens (GITHUB_TOKENS set) are pooled."""
+        monkeypatch.setenv('GITHUB_TOKENS', 'abc, def')
+        github = gdc.Github()
+
+        assert github.headers == {'Authorization': 'token abc'}
+        assert [t for t, _ in github.pool.tokens] == ['abc', 'def']
+        assert gdc.Github(tokens=[token_valid]).pool is None
+
+    def test_init_session(self):
+        """Test connection pool and retry configuration."""
+        adapter = gdc.Github(pool_size=4, retries=5).session.get_adapter(
+            'https://api.github.com')
+
+        assert adapter._pool_maxsize == 4 and \
+            adapter.max_retries.total == 5
+
 
 class TestGithubPrivate:
     """Test Github class private functions."""
@@ -92,7 +111,52 @@ class TestGithubPrivate:
 
             assert gdc.Github()._get(api) == json.loads(text)
 
-    def test_request_with_invalid_response(self, capfd):
+    def test_get_reuses_connection(self, fake_github):
+        """Test _get method keeps a single connection alive."""
+        github = gdc.Github(api=fake_github.url)
+        for _ in range(5):
+            assert github._get('/user') == {'login': 'octocat'}
+
+        assert fake_github.requests == 5 and fake_github.connections == 1
+
+    def test_hooks(self, fake_github, tmpdir):
+        """Test hooks are passed each completed API call."""
+        calls = []
+        fake_github.rate_limit = fake_github.remaining = 100
+        github = gdc.Github(api=fake_github.url, hooks=[calls.append],
+                            cache=Cache(str(tmpdir)))
+        github._get('/users/octocat/repos')
+        github._get('/users/octocat/repos')
+
+        miss, hit = calls
+        assert (miss.method, miss.template, miss.status, miss.cache,
+                miss.retries) == ('GET', '/users/:user/repos', 200, 'miss', 0)
+        assert miss.bytes > 0 and miss.latency > 0
+        assert miss.rate_limit.limit == 100
+        assert (hit.status, hit.cache, hit.bytes) == (304, 'hit', 0)
+
+    def test_paginate(self):
+        """Test _paginate method follows Link headers."""
+        url = 'https://api.github.com/users/brbsix/repos'
+        link = '<%s?per_page=100&page=2>; rel="next"' % url
+
+        with requests_mock.Mocker() as mock:
+            mock.get(url, text='[1, 2]', headers={'Link': link})
+            mock.get(url + '?page=2', text='[3]')
+            items = list(gdc.Github()._paginate('/users/brbsix/repos'))
+
+            assert mock.request_history[0].qs == {'per_page': ['100']}
+
+        assert items == [1, 2, 3] and mock.call_count == 2
+
+    def test_paginate_with_fake_server(self, fake_github):
+        """Test _paginate method against a server with several pages."""
+        fake_github.repos = ['repo-%03d' % r for r in range(250)]
+        repos = gdc.Github(api=fake_github.url)._paginate('/users/x/repos')
+
+        assert len(list(repos)) == 250 and fake_github.requests == 3
+
+    def test_request_with_invalid_response(self):
         """Test _request method with an invalid response."""
         api = '/badrequest'
         url = 'https://api.github.com' + api
@@ -104,15 +168,14 @@ class TestGithubPrivate:
         with requests_mock.Mocker() as mock:
             mock.get(url, text=text)
 
-            with pytest.raises(SystemExit) as exception:
+            with pytest.raises(gdc.GithubError) as exception:
                 # perform request
                 gdc.Github()._request(api)
 
-        # ensure stderr and exit status are as expected
-        assert capfd.readouterr()[1] == 'ERROR: Not Found\n' and \
-            exception.value.code is 1
+        # ensure the API error message is raised
+        assert str(exception.value) == 'Not Found'
 
-    def test_request_with_invalid_token(self, capfd, token_invalid):
+    def test_request_with_invalid_token(self, token_invalid):
         """Test _request method with an invalid authentication token."""
         api = '/user'
         url = 'https://api.github.com' + api
@@ -125,15 +188,14 @@ class TestGithubPrivate:
         with requests_mock.Mocker() as mock:
             mock.get(url, request_headers=request_headers, text=text)
 
-            with pytest.raises(SystemExit) as exception:
+            with pytest.raises(gdc.GithubError) as exception:
                 # perform request
                 gdc.Github()._request(api)
 
-        # ensure stderr and exit status are as expected
-        assert capfd.readouterr()[1] == 'ERROR: Bad credentials\n' \
-            and exception.value.code is 1
+        # ensure the API error message is raised
+        assert str(exception.value) == 'Bad credentials'
 
-    def test_request_with_no_token(self, capfd):
+    def test_request_with_no_token(self):
         """Test _request method with no authentication token."""
         api = '/user'
         url = 'https://api.github.com' + api
@@ -145,13 +207,12 @@ class TestGithubPrivate:
         with requests_mock.Mocker() as mock:
             mock.get(url, text=text)
 
-            with pytest.raises(SystemExit) as exception:
+            with pytest.raises(gdc.GithubError) as exception:
                 # perform request
                 gdc.Github()._request(api)
 
-        # ensure stderr and exit status are as expected
-        assert capfd.readouterr()[1] == 'ERROR: Requires authentication\n' \
-            and exception.value.code is 1
+        # ensure the API error message is raised
+        assert str(exception.value) == 'Requires authentication'
 
     def test_request_with_valid_response(self):
         """Test _request method with a valid response."""
@@ -218,6 +279,56 @@ class TestGithubGetReposByUser:
 
         assert repos == repos_wanted
 
+    @pytest.mark.parametrize('jobs', [1, 4])
+    def test_get_repos_by_user_pages(self, fake_github, jobs):
+        """Test listings of several pages (fetched concurrently)."""
+        fake_github.repos = ['repo-%03d' % r for r in range(250)]
+
+        repos = list(gdc.Github(jobs=jobs, api=fake_github.url)
+                     .get_repos_by_user('octocat'))
+
+        assert repos == fake_github.repos and fake_github.requests == 3
+
+    def test_get_releases_before_last_page(self, fake_github):
+        """Test serial scans fetch releases while the listing arrives."""
+        fake_github.repos = ['repo-%03d' % r for r in range(250)]
+        fake_github.releases = dict((r, []) for r in fake_github.repos)
+        calls = []
+        github = gdc.Github(api=fake_github.url, hooks=[calls.append])
+
+        assert github.get_releases_by_user('octocat') == []
+        templates = [c.template for c in calls]
+        assert templates.index('/repos/:owner/:repo/releases') < \
+            len(calls) - templates[::-1].index('/users/:user/repos') - 1
+        assert len(calls) == 253
+
+    def test_get_repos_by_user_skip(self, fake_github):
+        """Test forks and archived repos are left out if skipped."""
+        fake_github.forks.add('repo-001')
+        fake_github.archived.add('repo-002')
+
+        github = gdc.Github(api=fake_github.url, skip_forks=True)
+        assert 'repo-001' not in list(github.get_repos_by_user('octocat'))
+        github.skip_archived = True
+        assert list(github.get_repos_by_user('octocat')) == \
+            ['repo-%03d' % r for r in range(10) if r not in (1, 2)]
+
+    @pytest.mark.parametrize('owner,requests', [
+        ('octocat', 3), ('github', 2), ('someone', 3)])
+    def test_get_repos_by_user_authenticated(self, fake_github, monkeypatch,
+                                             owner, requests):
+        """Test private repos of organizations and the user are listed."""
+        monkeypatch.setenv('GITHUB_TOKEN', 'abc')
+        fake_github.orgs.add('github')
+        fake_github.private.add('repo-009')
+
+        repos = list(gdc.Github(api=fake_github.url)
+                     .get_repos_by_user(owner))
+
+        assert ('repo-009' in repos) == (owner != 'someone')
+        assert len(repos) == 10 - (owner == 'someone')
+        assert fake_github.requests == requests
+
 
 class TestGithubGetReleasesByRepo:
     """Test Github class get_releases_by_repo method."""
@@ -241,6 +352,47 @@ class TestGithubGetReleasesByRepo:
 
         assert releases == releases_wanted
 
+    @pytest.mark.skipif(gdc._ijson() is None, reason='requires ijson')
+    def test_get_releases_by_repo_stream(self):
+        """Test get_releases_by_repo method decoding incrementally."""
+        with requests_mock.Mocker() as mock:
+            mock.get('https://api.github.com/repos/brbsix/debtool/releases',
+                     text=read('debtool_releases'))
+            releases = list(gdc.Github(stream=True).get_releases_by_repo(
+                'brbsix', 'debtool'))
+
+        assert releases == [
+            ('debtool_0.2.5_all.deb', 62),
+            ('debtool_0.2.4_all.deb', 5),
+            ('debtool_0.2.1_all.deb', 0),
+            ('debtool_0.2.2_all.deb', 0),
+            ('debtool_0.2.3_all.deb', 2)
+        ]
+
+    @pytest.mark.skipif(gdc._ijson() is None, reason='requires ijson')
+    @pytest.mark.parametrize('cached', [False, True])
+    def test_get_assets_by_repo_stream(self, fake_github, tmpdir, cached):
+        """Test streamed assets match fully decoded ones (and the cache)."""
+        cache = Cache(str(tmpdir)) if cached else None
+        fake_github.releases['repo-001'] *= 60
+
+        for _ in range(2):
+            streamed = list(gdc.Github(api=fake_github.url, cache=cache,
+                                       stream=True).get_assets_by_repo(
+                                           'octocat', 'repo-001'))
+
+            assert streamed == list(gdc.Github(
+                api=fake_github.url).get_assets_by_repo('octocat',
+                                                        'repo-001'))
+        assert len(streamed) == 360
+
+    @pytest.mark.skipif(gdc._ijson() is None, reason='requires ijson')
+    def test_get_assets_by_repo_stream_error(self, fake_github):
+        """Test error responses are not decoded as release listings."""
+        with pytest.raises(gdc.GithubError, match='Not Found'):
+            list(gdc.Github(api=fake_github.url, stream=True)
+                 .get_assets_by_repo('octocat', 'nowhere'))
+
     def test_get_releases_by_repo_for_repo_without_releases(self):
         """Test get_releases_by_repo method for a repo without any releases."""
         with requests_mock.Mocker() as mock:
@@ -291,8 +443,9 @@ class TestGithubGetReleasesByTag:
 class TestGithubGetReleasesByUser:
     """Test Github class get_releases_by_user method."""
 
-    def test_get_releases_by_user(self):
-        """Test get_releases_by_user method."""
+    @pytest.mark.parametrize('jobs', [1, 4])
+    def test_get_releases_by_user(self, jobs):
+        """Test get_releases_by_user method (serial and concurrent)."""
         # repos used to create mocks
         repos = [
             'android_frameworks_base', 'aria2-webui-launcher', 'bart',
@@ -334,10 +487,166 @@ class TestGithubGetReleasesByUser:
             # set up mocks
             for url, text in mocks:
                 mock.get(url, text=text)
-            releases = list(gdc.Github().get_releases_by_user('brbsix'))
+            releases = list(
+                gdc.Github(jobs=jobs).get_releases_by_user('brbsix')
+            )
 
         assert releases == releases_wanted
 
+    def test_get_releases_by_user_concurrent_error(self):
+        """Test get_releases_by_user method exits if a worker fails."""
+        repos = '[{"full_name":"brbsix/one"},{"full_name":"brbsix/two"}]'
+        text = (
+            '{"message":"Not Found"'
+            ',"documentation_url":"https://developer.github.com/v3"}'
+        )
+
+        with requests_mock.Mocker() as mock:
+            mock.get('https://api.github.com/users/brbsix/repos', text=repos)
+            mock.get('https://api.github.com/repos/brbsix/one/releases',
+                     text='[]')
+            mock.get('https://api.github.com/repos/brbsix/two/releases',
+                     text=text)
+
+            with pytest.raises(gdc.GithubError) as exception:
+                gdc.Github(jobs=2).get_releases_by_user('brbsix')
+
+        # ensure the API error message is raised
+        assert str(exception.value) == 'Not Found'
+
+    def test_get_assets_by_user_skip_empty_cached(self, fake_github,
+                                                  tmpdir):
+        """Test repos without releases are skipped until pushed to."""
+        fake_github.releases['repo-001'] = []
+        cache = Cache(str(tmpdir))
+        avoided = []
+
+        def run():
+            """Return the assets found and count the requests made."""
+            fake_github.requests = 0
+            github = gdc.Github(api=fake_github.url, cache=cache, hooks=[
+                lambda c: c.cache == 'avoided' and avoided.append(c)])
+            return list(github.get_assets_by_user('octocat'))
+
+        assets = run()
+        assert fake_github.requests == 11 and not avoided
+        assert run() == assets and fake_github.requests == 10
+        assert [c.template for c in avoided] == \
+            ['/repos/:owner/:repo/releases']
+
+        fake_github.pushed_at['repo-001'] = '2017-01-01T00:00:00Z'
+        fake_github.releases['repo-001'] = fake_github.releases['repo-000']
+        assert len(run()) == len(assets) + 6 and fake_github.requests == 11
+
+    def test_get_assets_by_user_release_without_assets(self, fake_github,
+                                                       tmpdir):
+        """Test a release without assets yet is fetched again later."""
+        release = dict(fake_github.releases['repo-001'][0], assets=[])
+        assets = fake_github.releases['repo-001'][0]['assets']
+        fake_github.releases['repo-001'] = [release]
+        cache = Cache(str(tmpdir))
+
+        def run():
+            """Return the names of the repos whose assets were found."""
+            github = gdc.Github(api=fake_github.url, cache=cache)
+            return set(a.repo for a in github.get_assets_by_user('octocat'))
+
+        assert 'repo-001' not in run()
+        # assets uploaded afterwards, e.g. by CI, without a push
+        release['assets'] = assets
+        assert 'repo-001' in run()
+
+    def test_get_assets_by_user_skip_empty_counted(self, fake_github,
+                                                   monkeypatch):
+        """Test releases are counted when authenticated."""
+        fake_github.releases['repo-001'] = []
+        fake_github.releases['repo-002'] = []
+        assets = list(gdc.Github(api=fake_github.url)
+                      .get_assets_by_user('octocat'))
+
+        monkeypatch.setenv('GITHUB_TOKEN', 'abc')
+        fake_github.requests = 0
+
+        assert list(gdc.Github(api=fake_github.url)
+                    .get_assets_by_user('octocat')) == assets
+        # owner lookup, login, listing, count and releases of 8 repos
+        assert fake_github.requests == 12
+
+    def test_get_assets_by_user_skip_empty_error(self, monkeypatch):
+        """Test every repo is fetched if releases cannot be counted."""
+        monkeypatch.setenv('GITHUB_TOKEN', 'abc')
+        repos = '[{"full_name":"brbsix/one"},{"full_name":"brbsix/two"}]'
+
+        with requests_mock.Mocker() as mock:
+            mock.get('https://api.github.com/users/brbsix',
+                     text='{"login":"brbsix","type":"User"}')
+            mock.get('https://api.github.com/user', text='{"login":"me"}')
+            mock.get('https://api.github.com/users/brbsix/repos', text=repos)
+            mock.post('https://api.github.com/graphql',
+                      text='{"message":"Bad credentials"}')
+            mock.get('https://api.github.com/repos/brbsix/one/releases',
+                     text='[]')
+            mock.get('https://api.github.com/repos/brbsix/two/releases',
+                     text='[]')
+
+            assert gdc.Github().get_releases_by_user('brbsix') == []
+            assert mock.call_count == 6
+
+    @pytest.mark.parametrize('jobs', [1, 4])
+    def test_get_assets_by_user_keep_going(self, fake_github, jobs):
+        """Test failed repos are collected if keeping going."""
+        del fake_github.releases['repo-003']
+        github = gdc.Github(jobs=jobs, api=fake_github.url, keep_going=True)
+
+        assets = list(github.get_assets_by_user('octocat'))
+
+        assert len(assets) == 54 and \
+            github.failures == [('octocat/repo-003', 'Not Found')]
+
+    @pytest.mark.parametrize('backend', [gdc.Github, GithubGraphQL])
+    def test_get_assets_by_user_owners(self, fake_github, backend):
+        """Test several comma-separated owners, forks skipped."""
+        fake_github.forks.add('repo-000')
+
+        assets = list(backend(jobs=2, api=fake_github.url, skip_forks=True)
+                      .get_assets_by_user('octocat,github'))
+
+        assert sorted(set((a.user, a.repo) for a in assets)) == \
+            [(u, 'repo-%03d' % r) for u in ('github', 'octocat')
+             for r in range(1, 10)]
+        assert [a.user for a in assets[:54]] == ['octocat'] * 54
+
+
+class TestGithubGetCounts:
+    """Test Github class get_counts method."""
+
+    def test_get_counts(self, fake_github):
+        """Test get_counts method returns repo -> release -> asset results."""
+        fake_github.repos = ['repo-000', 'repo-001']
+        fake_github.releases['repo-001'] = []
+        counts = gdc.Github(api=fake_github.url).get_counts('octocat')
+
+        assert [r.name for r in counts] == ['repo-000']
+        assert [r.tag for r in counts[0].releases] == ['v0', 'v1']
+        assert counts[0].releases[1].assets[2] == gdc.Asset(
+            'octocat', 'repo-000', 'v1', 'repo-000-1.2.tar.gz', 12, 1, 5)
+        assert counts[0].download_count == 36 and \
+            counts[0].releases[0].download_count == 3
+
+    def test_get_counts_empty(self, fake_github):
+        """Test get_counts method for a repo without releases."""
+        fake_github.releases['repo-000'] = []
+        github = gdc.Github(api=fake_github.url)
+
+        assert github.get_counts('octocat', 'repo-000') == []
+
+    def test_get_counts_compact(self):
+        """Test results do not carry a per-instance __dict__."""
+        release = gdc.Release(1, 'v1', [])
+
+        assert not hasattr(gdc.Repo('octocat', 'repo', [release]),
+                           '__dict__') and not hasattr(release, '__dict__')
+
 
 class TestGithubGetUser:
     """Test Github class get_user method."""
@@ -389,20 +698,17 @@ class TestGithubShow:
 
     def test_show_with_user(self, capfd):
         """Test show method with user."""
-        data = [
-            ('caffeine-reloaded', [
-                ('caffeine-reloaded_0.0.3_all.deb', 2),
-                ('caffeine-reloaded_0.0.2_all.deb', 1),
-                ('caffeine-reloaded_0.0.1_all.deb', 0)
-            ]),
-            ('debtool', [
-                ('debtool_0.2.5_all.deb', 62),
-                ('debtool_0.2.4_all.deb', 5),
-                ('debtool_0.2.1_all.deb', 0),
-                ('debtool_0.2.2_all.deb', 0),
-                ('debtool_0.2.3_all.deb', 2)
-            ])
-        ]
+        data = assets('caffeine-reloaded', [
+            ('caffeine-reloaded_0.0.3_all.deb', 2),
+            ('caffeine-reloaded_0.0.2_all.deb', 1),
+            ('caffeine-reloaded_0.0.1_all.deb', 0)
+        ]) + assets('debtool', [
+            ('debtool_0.2.5_all.deb', 62),
+            ('debtool_0.2.4_all.deb', 5),
+            ('debtool_0.2.1_all.deb', 0),
+            ('debtool_0.2.2_all.deb', 0),
+            ('debtool_0.2.3_all.deb', 2)
+        ])
         text_wanted = (
             '\x1b[1mcaffeine-reloaded\x1b[0m\n'
             '2    caffeine-reloaded_0.0.3_all.deb\n'
@@ -419,51 +725,48 @@ class TestGithubShow:
         )
 
         github = gdc.Github()
-        with patch.object(github, 'get_releases_by_user') as mocked_function:
+        with patch.object(github, 'get_assets') as mocked_function:
             mocked_function.return_value = data
-            github.get_releases_by_user = mocked_function
+            github.get_assets = mocked_function
             github.show('brbsix')
 
-        mocked_function.assert_called_once_with('brbsix')
+        mocked_function.assert_called_once_with('brbsix', None, None)
         assert capfd.readouterr()[0] == text_wanted
 
     def test_show_with_user_summarized(self, capfd):
         """Test show method with user (summarized)."""
-        data = [
-            ('caffeine-reloaded', [
-                ('caffeine-reloaded_0.0.3_all.deb', 2),
-                ('caffeine-reloaded_0.0.2_all.deb', 1),
-                ('caffeine-reloaded_0.0.1_all.deb', 0)
-            ]),
-            ('debtool', [
-                ('debtool_0.2.5_all.deb', 62),
-                ('debtool_0.2.4_all.deb', 5),
-                ('debtool_0.2.1_all.deb', 0),
-                ('debtool_0.2.2_all.deb', 0),
-                ('debtool_0.2.3_all.deb', 2)
-            ])
-        ]
+        data = assets('caffeine-reloaded', [
+            ('caffeine-reloaded_0.0.3_all.deb', 2),
+            ('caffeine-reloaded_0.0.2_all.deb', 1),
+            ('caffeine-reloaded_0.0.1_all.deb', 0)
+        ]) + assets('debtool', [
+            ('debtool_0.2.5_all.deb', 62),
+            ('debtool_0.2.4_all.deb', 5),
+            ('debtool_0.2.1_all.deb', 0),
+            ('debtool_0.2.2_all.deb', 0),
+            ('debtool_0.2.3_all.deb', 2)
+        ])
         text_wanted = dedent('''\
             3    caffeine-reloaded
             69   debtool
             ''')
 
         github = gdc.Github()
-        with patch.object(github, 'get_releases_by_user') as mocked_function:
+        with patch.object(github, 'get_assets') as mocked_function:
             mocked_function.return_value = data
-            github.get_releases_by_user = mocked_function
+            github.get_assets = mocked_function
             github.show('brbsix', summarize=True)
 
-        mocked_function.assert_called_once_with('brbsix')
+        mocked_function.assert_called_once_with('brbsix', None, None)
         assert capfd.readouterr()[0] == text_wanted
 
     def test_show_with_repo(self, capfd):
         """Test show method with repo."""
-        data = [('debtool_0.2.5_all.deb', 62),
-                ('debtool_0.2.4_all.deb', 5),
-                ('debtool_0.2.1_all.deb', 0),
-                ('debtool_0.2.2_all.deb', 0),
-                ('debtool_0.2.3_all.deb', 2)]
+        data = assets('debtool', [('debtool_0.2.5_all.deb', 62),
+                                  ('debtool_0.2.4_all.deb', 5),
+                                  ('debtool_0.2.1_all.deb', 0),
+                                  ('debtool_0.2.2_all.deb', 0),
+                                  ('debtool_0.2.3_all.deb', 2)])
         text_wanted = dedent('''\
             62   debtool_0.2.5_all.deb
             5    debtool_0.2.4_all.deb
@@ -473,114 +776,302 @@ class TestGithubShow:
             ''')
 
         github = gdc.Github()
-        with patch.object(github, 'get_releases_by_repo') as mocked_function:
+        with patch.object(github, 'get_assets') as mocked_function:
             mocked_function.return_value = data
-            github.get_releases_by_repo = mocked_function
+            github.get_assets = mocked_function
             github.show('brbsix', 'debtool')
 
-        mocked_function.assert_called_once_with('brbsix', 'debtool')
+        mocked_function.assert_called_once_with('brbsix', 'debtool', None)
         assert capfd.readouterr()[0] == text_wanted
 
     def test_show_with_repo_summarized(self, capfd):
         """Test show method with repo (summarized)."""
-        data = [('debtool_0.2.5_all.deb', 62),
-                ('debtool_0.2.4_all.deb', 5),
-                ('debtool_0.2.1_all.deb', 0),
-                ('debtool_0.2.2_all.deb', 0),
-                ('debtool_0.2.3_all.deb', 2)]
+        data = assets('debtool', [('debtool_0.2.5_all.deb', 62),
+                                  ('debtool_0.2.4_all.deb', 5),
+                                  ('debtool_0.2.1_all.deb', 0),
+                                  ('debtool_0.2.2_all.deb', 0),
+                                  ('debtool_0.2.3_all.deb', 2)])
         text_wanted = '69\n'
 
         github = gdc.Github()
-        with patch.object(github, 'get_releases_by_repo') as mocked_function:
+        with patch.object(github, 'get_assets') as mocked_function:
             mocked_function.return_value = data
-            github.get_releases_by_repo = mocked_function
+            github.get_assets = mocked_function
             github.show('brbsix', 'debtool', summarize=True)
 
-        mocked_function.assert_called_once_with('brbsix', 'debtool')
+        mocked_function.assert_called_once_with('brbsix', 'debtool', None)
         assert capfd.readouterr()[0] == text_wanted
 
     def test_show_with_tag(self, capfd):
         """Test show method with tag."""
-        data = [('debtool_0.2.5_all.deb', 62)]
+        data = assets('debtool', [('debtool_0.2.5_all.deb', 62)])
         text_wanted = '62   debtool_0.2.5_all.deb\n'
 
         github = gdc.Github()
-        with patch.object(github, 'get_releases_by_tag') as mocked_function:
+        with patch.object(github, 'get_assets') as mocked_function:
             mocked_function.return_value = data
-            github.get_releases_by_tag = mocked_function
+            github.get_assets = mocked_function
             github.show('brbsix', 'debtool', 'v0.2.5')
 
         mocked_function.assert_called_once_with('brbsix', 'debtool', 'v0.2.5')
         assert capfd.readouterr()[0] == text_wanted
 
+    def test_show_without_releases(self, capfd):
+        """Test show method prints nothing (and does not exit)."""
+        github = gdc.Github()
+        with patch.object(github, 'get_assets') as mocked_function:
+            mocked_function.return_value = []
+            github.get_assets = mocked_function
+            github.show('brbsix')
+            github.show('brbsix', 'debtool')
+
+        assert capfd.readouterr()[0] == ''
+
     def test_show_with_tag_summarized(self, capfd):
         """Test show method with tag (summarized)."""
-        data = [('debtool_0.2.5_all.deb', 62)]
+        data = assets('debtool', [('debtool_0.2.5_all.deb', 62)])
         text_wanted = '62\n'
 
         github = gdc.Github()
-        with patch.object(github, 'get_releases_by_tag') as mocked_function:
+        with patch.object(github, 'get_assets') as mocked_function:
             mocked_function.return_value = data
-            github.get_releases_by_tag = mocked_function
+            github.get_assets = mocked_function
             github.show('brbsix', 'debtool', 'v0.2.5', summarize=True)
 
         mocked_function.assert_called_once_with('brbsix', 'debtool', 'v0.2.5')
         assert capfd.readouterr()[0] == text_wanted
 
 
-##################
-# FUNCTION TESTS #
-##################
+class TestGithubShowFormats:
+    """Test Github class show method with machine-readable formats."""
+
+    def test_show_jsonl(self, capfd, fake_github):
+        """Test show method writes one JSON record per asset."""
+        fake_github.repos = ['repo-000']
+
+        gdc.Github(api=fake_github.url).show('octocat', output='jsonl')
+        lines = capfd.readouterr()[0].splitlines()
+
+        assert len(lines) == 6 and json.loads(lines[0]) == {
+            'user': 'octocat', 'repo': 'repo-000', 'tag': 'v0',
+            'name': 'repo-000-0.0.tar.gz', 'download_count': 0
+        }
+
+    def test_show_csv(self, capfd, fake_github):
+        """Test show method writes CSV with a header."""
+        gdc.Github(api=fake_github.url).show('octocat', 'repo-001', 'v1',
+                                             output='csv')
+        text_wanted = (
+            'user,repo,tag,name,download_count\n'
+            'octocat,repo-001,v1,repo-001-1.0.tar.gz,10\n'
+            'octocat,repo-001,v1,repo-001-1.1.tar.gz,11\n'
+            'octocat,repo-001,v1,repo-001-1.2.tar.gz,12\n'
+        )
+
+        assert capfd.readouterr()[0] == text_wanted
+
+    def test_show_csv_summarized(self, capfd, fake_github):
+        """Test show method writes CSV totals per repo."""
+        fake_github.repos = ['repo-000', 'repo-001']
+        gdc.Github(api=fake_github.url).show('octocat', summarize=True,
+                                             output='csv')
+        text_wanted = (
+            'user,repo,download_count\n'
+            'octocat,repo-000,36\n'
+            'octocat,repo-001,36\n'
+        )
+
+        assert capfd.readouterr()[0] == text_wanted
 
-class TestParser:
-    """Test _parser function."""
+    def test_show_targets_csv(self, capfd, fake_github):
+        """Test show_targets method writes a single CSV header."""
+        targets = [('octocat', 'repo-000', 'v0'),
+                   ('octocat', 'repo-001', 'v0')]
+        gdc.Github(api=fake_github.url).show_targets(targets, output='csv')
+        lines = capfd.readouterr()[0].splitlines()
 
-    def test_parser(self):
-        """Test _parser with no arguments."""
-        namespace = argparse.Namespace(
-            repo=None, summarize=False, tag=None, user=None)
+        assert lines[0] == 'user,repo,tag,name,download_count' and \
+            len(lines) == 7 and lines.count(lines[0]) == 1
 
-        assert gdc._parser(None) == namespace and gdc._parser([]) == namespace
 
-    def test_parser_summarize(self):
-        """Test _parser with -s/--summarize."""
-        namespace = argparse.Namespace(
-            repo=None, summarize=True, tag=None, user=None)
+class TestGithubShowSelection:
+    """Test Github class show method with top, min_downloads and sort."""
 
-        for flag in ('-s', '--summarize'):
-            assert gdc._parser([flag]) == namespace
+    def test_show_top(self, capfd, fake_github):
+        """Test show method prints the most downloaded assets."""
+        fake_github.releases['repo-004'][1]['assets'][0]['download_count'] \
+            = 100
 
-    def test_parser_with_user(self):
-        """Test _parser with USER."""
-        namespace = argparse.Namespace(
-            repo=None, summarize=False, tag=None, user='nobody')
+        gdc.Github(api=fake_github.url).show('octocat', top=3)
+
+        assert capfd.readouterr()[0] == (
+            '100   repo-004/repo-004-1.0.tar.gz\n'
+            '12    repo-000/repo-000-1.2.tar.gz\n'
+            '12    repo-001/repo-001-1.2.tar.gz\n'
+        )
 
-        assert gdc._parser(['nobody']) == namespace
+    def test_show_top_summarized(self, capfd, fake_github):
+        """Test show method prints the most downloaded repos."""
+        fake_github.releases['repo-007'][0]['assets'][0]['download_count'] \
+            = 5
 
-    def test_parser_with_repo(self):
-        """Test _parser with repo."""
-        namespace = argparse.Namespace(
-            repo='nowhere', summarize=False, tag=None, user='nobody')
+        gdc.Github(api=fake_github.url).show('octocat', summarize=True,
+                                             top=2, sort='name')
 
-        assert gdc._parser(['nobody', 'nowhere']) == namespace
+        assert capfd.readouterr()[0] == '36   repo-000\n41   repo-007\n'
 
-    def test_parser_with_tag(self):
-        """Test _parser with tag."""
-        namespace = argparse.Namespace(
-            repo='nowhere', summarize=False, tag='nothing', user='nobody')
+    def test_show_min_downloads(self, capfd, fake_github):
+        """Test show method streams assets above a threshold."""
+        fake_github.repos = ['repo-000', 'repo-001']
 
-        assert gdc._parser(['nobody', 'nowhere', 'nothing']) == namespace
+        gdc.Github(api=fake_github.url).show('octocat', 'repo-001',
+                                             output='jsonl',
+                                             min_downloads=11)
+        lines = capfd.readouterr()[0].splitlines()
 
+        assert [json.loads(l)['download_count'] for l in lines] == [11, 12]
 
-def test_bold_normal():
-    """Test bold function."""
-    assert gdc.bold('repository') == '\033[1mrepository\033[0m'
+    def test_show_sort_downloads(self, capfd, fake_github):
+        """Test show method orders a repo's assets by download count."""
+        gdc.Github(api=fake_github.url).show('octocat', 'repo-001',
+                                             sort='downloads')
+
+        assert capfd.readouterr()[0].splitlines()[:2] == [
+            '12   repo-001-1.2.tar.gz', '11   repo-001-1.1.tar.gz']
+
+
+class TestGithubShowGroups:
+    """Test Github class show method with matchers and group_by."""
+
+    def test_get_assets_with_matcher(self, fake_github):
+        """Test get_assets only yields assets selected by the matcher."""
+        github = gdc.Github(api=fake_github.url, matcher=gdc.Matcher(
+            ['*.1.tar.gz'], ['re:^repo-00[1-9]']))
+
+        assert [a.name for a in github.get_assets('octocat')] == \
+            ['repo-000-0.1.tar.gz', 'repo-000-1.1.tar.gz']
+
+    def test_show_group_by_release(self, capfd, fake_github):
+        """Test show method sums downloads per release."""
+        fake_github.repos = ['repo-000', 'repo-001']
+
+        gdc.Github(api=fake_github.url).show('octocat', group_by='release',
+                                             sort='downloads')
+
+        assert capfd.readouterr()[0] == (
+            '33   repo-000@v1\n'
+            '33   repo-001@v1\n'
+            '3    repo-000@v0\n'
+            '3    repo-001@v0\n'
+        )
+
+    def test_show_group_by_extension(self, capfd, fake_github):
+        """Test show method sums downloads per file extension as CSV."""
+        fake_github.releases['repo-002'][0]['assets'][0]['name'] = 'x.ZIP'
+
+        gdc.Github(api=fake_github.url).show('octocat', group_by='extension',
+                                             output='csv')
+
+        assert capfd.readouterr()[0] == (
+            'group,download_count\n.tar.gz,360\n.zip,0\n')
+
+    def test_show_group_by_pattern(self, capfd, fake_github):
+        """Test show method sums downloads per include pattern."""
+        github = gdc.Github(api=fake_github.url, matcher=gdc.Matcher(
+            ['*.0.tar.gz', 're:[12]\\.tar'], ['repo-00[1-9]*']))
+
+        github.show('octocat', group_by='pattern')
+
+        assert capfd.readouterr()[0] == \
+            '10   *.0.tar.gz\n26   re:[12]\\.tar\n'
+
+
+class TestGithubShowTargets:
+    """Test Github class show_targets method."""
+
+    def test_show_targets(self, capfd, fake_github):
+        """Test show_targets method with user, repo and tag targets."""
+        fake_github.repos = ['repo-000', 'repo-001']
+        targets = [('octocat', 'repo-000', None),
+                   ('octocat', 'repo-001', 'v1'),
+                   ('octocat', None, None)]
+        text_wanted = (
+            '\x1b[1moctocat/repo-000\x1b[0m\n'
+            '0    repo-000-0.0.tar.gz\n'
+            '1    repo-000-0.1.tar.gz\n'
+            '2    repo-000-0.2.tar.gz\n'
+            '10   repo-000-1.0.tar.gz\n'
+            '11   repo-000-1.1.tar.gz\n'
+            '12   repo-000-1.2.tar.gz\n'
+            '\n'
+            '\x1b[1moctocat/repo-001@v1\x1b[0m\n'
+            '10   repo-001-1.0.tar.gz\n'
+            '11   repo-001-1.1.tar.gz\n'
+            '12   repo-001-1.2.tar.gz\n'
+            '\n'
+            '\x1b[1moctocat/repo-000\x1b[0m\n'
+        )
+
+        github = gdc.Github(api=fake_github.url)
+        github.show_targets(targets)
+
+        assert capfd.readouterr()[0].startswith(text_wanted) and \
+            fake_github.requests == 5
+
+    def test_show_targets_summarized(self, capfd, fake_github):
+        """Test show_targets method (summarized) with failing targets."""
+        targets = [('octocat', 'repo-%03d' % r, None) for r in range(10)]
+        targets.insert(3, ('octocat', 'missing', None))
+
+        github = gdc.Github(jobs=4, api=fake_github.url)
+        failures = github.show_targets(targets, summarize=True)
+        out, err = capfd.readouterr()
+
+        assert failures == 1 and err == 'ERROR: Not Found\n'
+        assert sorted(out.splitlines()) == sorted(
+            '36   octocat/repo-%03d' % r for r in range(10))
+
+    def test_show_targets_connection_error(self, capfd, fake_github):
+        """Test a dropped connection only fails its own target."""
+        fake_github.dropped.add('repo-001')
+        targets = [('octocat', 'repo-%03d' % r, None) for r in range(3)]
+
+        github = gdc.Github(api=fake_github.url, retries=0)
+        failures = github.show_targets(targets, summarize=True)
+
+        assert failures == 1 and capfd.readouterr()[0].splitlines() == [
+            '36   octocat/repo-000', '36   octocat/repo-002']
+
+
+##################
+# FUNCTION TESTS #
+##################
+
+def test_select():
+    """Test select function."""
+    records = [gdc.Total('u', 'b', 5), gdc.Total('u', 'a', 9),
+               gdc.Total('u', 'c', 1), gdc.Total('u', 'd', 7)]
+
+    assert gdc.select(iter(records), top=2) == [records[1], records[3]]
+    assert list(gdc.select(iter(records), min_downloads=5)) == \
+        [records[0], records[1], records[3]]
+    assert gdc.select(records, top=3, sort='name') == \
+        [records[1], records[0], records[3]]
+    assert gdc.select(records, sort='downloads') == \
+        [records[1], records[3], records[0], records[2]]
+    assert gdc.select(records, top=0) == []
 
 
 ####################
 # HELPER FUNCTIONS #
 ####################
 
+def assets(repo, releases):
+    """Return Asset records of (name, download_count) releases."""
+    return [gdc.Asset('brbsix', repo, None, name, download_count, None, None)
+            for name, download_count in releases]
+
+
 def read(name):
     """Return contents of .txt file in the test's data directory."""
     # pass utf8 encoding flag for Python 2.7 support
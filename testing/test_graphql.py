@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for graphql.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# external imports
+import pytest
+import requests_mock
+
+# application imports
+from gdc import gdc
+from gdc.graphql import GithubGraphQL
+
+
+###############
+# CLASS TESTS #
+###############
+
+class TestGithubGraphQL:
+    """Test GithubGraphQL class."""
+
+    def test_get_releases_by_user(self, fake_github):
+        """Test get_releases_by_user matches the REST backend."""
+        fake_github.repos = ['repo-%03d' % r for r in range(120)]
+        fake_github.releases = dict(
+            (repo, fake_github.releases['repo-000']) for repo in
+            fake_github.repos)
+        # no releases, too many releases and too many assets
+        fake_github.releases['repo-001'] = []
+        fake_github.releases['repo-002'] = \
+            fake_github.releases['repo-000'] * 30
+        fake_github.releases['repo-003'] = [{
+            'id': 1, 'tag_name': 'v1', 'assets': [
+                {'id': a, 'name': 'a%d' % a, 'download_count': a}
+                for a in range(150)]
+        }]
+
+        graphql = GithubGraphQL(api=fake_github.url)
+        releases = graphql.get_releases_by_user('octocat')
+        requests = fake_github.requests
+
+        assert releases == gdc.Github(
+            api=fake_github.url).get_releases_by_user('octocat')
+        # three pages of repositories and two REST fallbacks
+        assert len(releases) == 119 and requests == 5
+
+    def test_get_releases_by_user_not_found(self):
+        """Test get_releases_by_user for an unknown user."""
+        with requests_mock.Mocker() as mock:
+            mock.post('https://api.github.com/graphql',
+                      text='{"data":{"repositoryOwner":null}}')
+
+            with pytest.raises(gdc.GithubError) as exception:
+                GithubGraphQL().get_releases_by_user('nobody')
+
+        assert str(exception.value) == 'Not Found'
+
+    def test_get_releases_by_user_owned(self, fake_github):
+        """Test repos the user only collaborates on are not listed."""
+        fake_github.collaborations['other-repo'] = \
+            fake_github.releases['repo-000']
+
+        releases = GithubGraphQL(
+            api=fake_github.url).get_releases_by_user('octocat')
+
+        assert releases == gdc.Github(
+            api=fake_github.url).get_releases_by_user('octocat')
+        assert len(releases) == 10
+
+    def test_graphql_enterprise(self):
+        """Test GitHub Enterprise's GraphQL endpoint is not under v3."""
+        with requests_mock.Mocker() as mock:
+            mock.post('https://ghe.example.com/api/graphql',
+                      text='{"data":{"viewer":{"login":"x"}}}')
+
+            assert GithubGraphQL(
+                api='https://ghe.example.com/api/v3')._graphql(
+                    'query { viewer { login } }') == {
+                        'viewer': {'login': 'x'}}
+
+        assert gdc.graphql_url(gdc.API) == 'https://api.github.com/graphql'
+
+    def test_graphql_with_errors(self):
+        """Test _graphql method with an error response."""
+        text = '{"errors":[{"message":"Something went wrong"}]}'
+
+        with requests_mock.Mocker() as mock:
+            mock.post('https://api.github.com/graphql', text=text)
+
+            with pytest.raises(gdc.GithubError) as exception:
+                GithubGraphQL()._graphql('query { viewer { login } }')
+
+        assert str(exception.value) == 'Something went wrong'
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for match.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# external imports
+import pytest
+
+# application imports
+from gdc.match import Matcher, compile_pattern, compile_patterns, extension
+
+
+class TestMatcher:
+    """Test Matcher class."""
+
+    def test_all(self):
+        """Test every name is selected without patterns."""
+        assert Matcher()('anything') and Matcher().bucket('anything') == ''
+
+    def test_include_glob(self):
+        """Test globs must match the whole name."""
+        matcher = Matcher(['*.deb'])
+
+        assert matcher('tool_1.0_all.deb')
+        assert not matcher('tool_1.0_all.deb.sig')
+
+    def test_include_regex(self):
+        """Test regular expressions match anywhere in the name."""
+        matcher = Matcher(['re:linux-(x64|arm64)'])
+
+        assert matcher('tool-linux-arm64.tar.gz')
+        assert not matcher('tool-linux-x86.tar.gz')
+
+    def test_include_regex_flags_and_groups(self):
+        """Test inline flags and backreferences of regular expressions."""
+        assert Matcher(['re:(?i)linux'])('tool-Linux.tar.gz')
+        matcher = Matcher(['*.zip', r're:(\w+)-\1'])
+
+        assert matcher('tool-tool.tar.gz') and not matcher('tool-x.tar.gz')
+
+    def test_exclude(self):
+        """Test excluded names are never selected."""
+        matcher = Matcher(['*'], ['*.sig', 're:^SHA'])
+
+        assert [n for n in ('a.zip', 'a.zip.sig', 'SHA256SUMS')
+                if matcher(n)] == ['a.zip']
+
+    def test_bucket(self):
+        """Test names are bucketed by the pattern they match."""
+        matcher = Matcher(['*win*', '*linux*', '*'])
+
+        assert [matcher.bucket(n) for n in ('tool-win64.zip',
+                                            'tool-linux.tar.gz',
+                                            'tool.dmg')] == \
+            ['*win*', '*linux*', '*']
+        assert Matcher(['*.deb']).bucket('tool.rpm') is None
+
+
+def test_compile_patterns():
+    """Test each pattern is compiled on its own."""
+    assert compile_patterns([]) == []
+    assert [p for p, _ in compile_patterns(['*.deb', 're:x'])] == \
+        ['*.deb', 're:x']
+    assert compile_pattern('*.deb').search('a.deb')
+    assert not compile_pattern('*.deb').search('a.deb.sig')
+
+
+@pytest.mark.parametrize('name,expected', [
+    ('tool-1.0.tar.gz', '.tar.gz'),
+    ('tool-1.0.tar.XZ', '.tar.xz'),
+    ('tool_1.0_all.deb', '.deb'),
+    ('tool-1.0.0', ''),
+    ('SHA256SUMS', '')
+])
+def test_extension(name, expected):
+    """Test extensions of asset names."""
+    assert extension(name) == expected
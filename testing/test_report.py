@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for report.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import json
+from textwrap import dedent
+
+# application imports
+from gdc import gdc, report
+from gdc.store import DAY, Store, Usage
+
+
+##################
+# FUNCTION TESTS #
+##################
+
+def test_rates():
+    """Test rates function."""
+    usages = [Usage('d1', 'u', 'a', 'v1', 'x', 3),
+              Usage('d1', 'u', 'a', 'v2', 'x', 4),
+              Usage('d1', 'u', 'b', 'v1', 'y', 7),
+              Usage('d2', 'u', 'a', 'v1', 'x', 1)]
+
+    assert report.rates(usages, 'repo', 2) == [
+        report.Rate('d1', 'u', 'a', None, None, 7, 3.5),
+        report.Rate('d1', 'u', 'b', None, None, 7, 3.5),
+        report.Rate('d2', 'u', 'a', None, None, 1, 0.5)
+    ]
+    assert report.rates(usages, 'user', 7) == [
+        report.Rate('d1', 'u', None, None, None, 14, 2.0),
+        report.Rate('d2', 'u', None, None, None, 1, 0.14)
+    ]
+    assert len(report.rates(usages, 'asset', 1)) == 4
+
+
+def test_show_report(capsys, tmpdir):
+    """Test show_report per window and per day."""
+    records = [gdc.Asset('octocat', 'repo', 'v1', name, 5, 1, index)
+               for index, name in enumerate(('a.zip', 'b.zip'))]
+    store = Store(str(tmpdir.join('history.sqlite3')))
+    store.record(records, 0)
+    store.record([a._replace(download_count=15) for a in records], DAY + 1)
+
+    report.show_report(store, 0, 3 * DAY)
+    assert capsys.readouterr()[0] == '20  6.7/day  octocat/repo\n'
+
+    report.show_report(store, 0, 3 * DAY, every='day', by='asset')
+    assert capsys.readouterr()[0] == dedent('''\
+        %s
+        10  10.0/day  octocat/repo/a.zip
+        10  10.0/day  octocat/repo/b.zip
+
+        ''') % report.bold('1970-01-02')
+
+    report.show_report(store, 0, 3 * DAY, by='user', output='jsonl')
+    assert json.loads(capsys.readouterr()[0]) == {
+        'start': '1970-01-01T00:00:00Z', 'user': 'octocat',
+        'downloads': 20, 'rate': 6.67}
+    store.close()
+
+
+def test_bold_normal():
+    """Test bold function."""
+    assert report.bold('repository') == '\033[1mrepository\033[0m'
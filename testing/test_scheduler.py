@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for scheduler.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# external imports
+import pytest
+import requests
+import requests_mock
+
+# application imports
+from gdc import gdc
+from gdc.scheduler import Budget, Scheduler, TokenPool
+
+
+class TestSchedulerDelay:
+    """Test Scheduler.delay method."""
+
+    @pytest.mark.parametrize('status', [200, 304, 404, 422])
+    def test_delay_not_retried(self, status):
+        """Test successful and client error responses are not retried."""
+        assert Scheduler().delay(response(status), 0) is None
+
+    def test_delay_forbidden(self):
+        """Test a 403 that is not rate limiting is not retried."""
+        forbidden = response(403, text='{"message":"Must have admin rights"}')
+
+        assert Scheduler().delay(forbidden, 0) is None
+
+    def test_delay_retry_after(self):
+        """Test Retry-After is honoured for secondary rate limits."""
+        limited = response(403, headers={'Retry-After': '30'})
+
+        assert Scheduler().delay(limited, 0) == 30
+
+    def test_delay_until_reset(self, clock):
+        """Test an exhausted budget waits until the reset time."""
+        limited = response(403, headers=limit_headers(5000, 0, 1060))
+
+        assert Scheduler(clock=clock).delay(limited, 0) == 61
+
+    @pytest.mark.parametrize('status', [429, 500, 502, 503])
+    def test_delay_jitter(self, status):
+        """Test exponential backoff with jitter."""
+        scheduler = Scheduler(backoff=1.0)
+
+        assert 0 <= scheduler.delay(response(status), 2) <= 4
+
+    def test_delay_gives_up(self):
+        """Test retries are limited."""
+        assert Scheduler(retries=2).delay(response(502), 2) is None
+
+
+class TestSchedulerPacing:
+    """Test Scheduler.update and Scheduler.wait methods."""
+
+    def test_update(self):
+        """Test the budget is read from rate limit headers."""
+        scheduler = Scheduler()
+        scheduler.update(response(200, headers=limit_headers(60, 42, 99)))
+
+        assert scheduler.budget == Budget(60, 42, 99)
+
+    def test_update_out_of_order(self):
+        """Test a stale response does not raise the remaining budget."""
+        scheduler = Scheduler()
+        scheduler.update(response(200, headers=limit_headers(60, 40, 99)))
+        scheduler.update(response(200, headers=limit_headers(60, 41, 99)))
+
+        assert scheduler.budget.remaining == 40
+
+    def test_wait_plenty(self, clock):
+        """Test requests are not delayed while the budget is plentiful."""
+        sleeps = []
+        scheduler = Scheduler(sleep=sleeps.append, clock=clock)
+        scheduler.update(response(200, headers=limit_headers(100, 50, 1100)))
+        scheduler.wait()
+
+        assert sleeps == [] and scheduler.budget.remaining == 49
+
+    def test_wait_paced(self, clock):
+        """Test the reserve is spread evenly until the reset time."""
+        sleeps = []
+        scheduler = Scheduler(sleep=sleeps.append, clock=clock)
+        scheduler.update(response(200, headers=limit_headers(100, 5, 1100)))
+        for _ in range(3):
+            scheduler.wait()
+
+        assert sleeps == [20, 45]
+
+    def test_wait_exhausted(self, clock):
+        """Test an exhausted budget waits for the reset time."""
+        sleeps = []
+        scheduler = Scheduler(sleep=sleeps.append, clock=clock)
+        scheduler.update(response(200, headers=limit_headers(100, 0, 1010)))
+        scheduler.wait()
+
+        assert sleeps == [11]
+
+    def test_wait_after_reset(self, clock):
+        """Test a new window is not paced with the old budget."""
+        sleeps = []
+        scheduler = Scheduler(sleep=sleeps.append, clock=clock)
+        scheduler.update(response(200, headers=limit_headers(100, 0, 900)))
+        scheduler.wait()
+
+        assert sleeps == [] and scheduler.budget.remaining is None
+
+    def test_wait_per_resource(self, clock):
+        """Test an exhausted GraphQL budget does not delay REST requests."""
+        sleeps = []
+        scheduler = Scheduler(sleep=sleeps.append, clock=clock)
+        scheduler.update(response(200, headers=limit_headers(100, 50, 1100)))
+        scheduler.update(response(200, headers=dict(
+            limit_headers(100, 0, 1010), **{
+                'X-RateLimit-Resource': 'graphql'})))
+        scheduler.wait()
+        scheduler.wait('graphql')
+
+        assert sleeps == [11] and scheduler.budget.remaining == 49
+        assert scheduler.get_budget('graphql') == Budget(100, -1, 1010)
+
+
+class TestTokenPool:
+    """Test TokenPool class."""
+
+    def test_acquire_unknown_in_turn(self, clock):
+        """Test tokens without a known budget are used in turn."""
+        pool = TokenPool(['a', 'b', 'c'], clock=clock)
+
+        assert [pool.acquire()[0] for _ in range(4)] == ['a', 'b', 'c', 'a']
+
+    def test_acquire_most_remaining(self, clock):
+        """Test the token with the most remaining budget is used."""
+        pool = TokenPool(['a', 'b'], clock=clock)
+        for (_, scheduler), remaining in zip(pool.tokens, (10, 20)):
+            scheduler.update(response(
+                200, headers=limit_headers(100, remaining, 1100)))
+
+        assert [pool.acquire()[0] for _ in range(12)] == \
+            ['b'] * 10 + ['a', 'b']
+
+    def test_acquire_parked(self, clock):
+        """Test exhausted tokens are parked until their reset time."""
+        sleeps = []
+        pool = TokenPool(['a', 'b', 'c'], sleep=sleeps.append, clock=clock)
+        for (_, scheduler), reset in zip(pool.tokens, (1060, 1010, 900)):
+            scheduler.update(response(
+                200, headers=limit_headers(100, 0, reset)))
+
+        # c's window has reset
+        assert pool.available() and pool.wait()[0] == 'c'
+        pool.tokens.pop()
+        assert not pool.available()
+        assert pool.wait()[0] == 'b' and sleeps == [11]
+
+
+class TestGithubScheduling:
+    """Test Github requests go through the scheduler."""
+
+    def test_retry(self):
+        """Test rate limited and failed requests are retried."""
+        sleeps = []
+        github = gdc.Github(scheduler=Scheduler(sleep=sleeps.append))
+
+        with requests_mock.Mocker() as mock:
+            mock.get('https://api.github.com/user', [
+                {'status_code': 429, 'headers': {'Retry-After': '2'}},
+                {'status_code': 502, 'text': 'Bad Gateway'},
+                {'text': '{"login":"brbsix"}'}
+            ])
+
+            assert github.get_user() == 'brbsix'
+
+        assert sleeps[0] == 2 and len(sleeps) == 2
+
+    def test_rate_limit_with_fake_server(self, fake_github):
+        """Test the budget is tracked against the fake server."""
+        fake_github.rate_limit = fake_github.remaining = 100
+        github = gdc.Github(api=fake_github.url)
+        github.get_releases_by_user('octocat')
+
+        assert github.get_rate_limit().remaining == 89
+
+    def test_graphql_budget(self):
+        """Test GraphQL queries are paced by the graphql budget."""
+        github = gdc.Github(scheduler=Scheduler(sleep=None))
+
+        with requests_mock.Mocker() as mock:
+            mock.post('https://api.github.com/graphql', text='{"data":{}}',
+                      headers=dict(limit_headers(100, 0, 2 ** 40), **{
+                          'X-RateLimit-Resource': 'graphql'}))
+            mock.get('https://api.github.com/user', text='{"login":"x"}',
+                     headers=limit_headers(100, 50, 2 ** 40))
+            github._graphql('query { viewer { login } }')
+
+            assert github.get_user() == 'x'
+
+        assert github.scheduler.budget.remaining == 50
+        assert github.scheduler.get_budget('graphql').remaining == 0
+
+    def test_exhausted_with_fake_server(self, fake_github):
+        """Test requests wait for the reset time once exhausted."""
+        fake_github.rate_limit = fake_github.remaining = 2
+        fake_github.window = 1
+        sleeps = []
+        github = gdc.Github(api=fake_github.url,
+                            scheduler=Scheduler(sleep=sleeps.append))
+        github._get('/user')
+        github._get('/user')
+        fake_github.reset = 0
+
+        assert github._get('/user') == {'login': 'octocat'} and \
+            len(sleeps) == 1
+
+    def test_token_pool_with_fake_server(self, fake_github):
+        """Test a scan beyond one token's budget is spread over several."""
+        fake_github.rate_limit = 5
+        sleeps = []
+        github = gdc.Github(api=fake_github.url, tokens=['a', 'b', 'c'])
+        github.pool = TokenPool(['a', 'b', 'c'], sleep=sleeps.append)
+
+        # owner lookup, login, listing, release count and 10 releases
+        assert len(github.get_releases_by_user('octocat')) == 10
+        assert sleeps == [] and sorted(fake_github.budgets.values()) == \
+            [0, 0, 1]
+
+    def test_token_pool_retry_with_fake_server(self, fake_github):
+        """Test a rate limited request is retried at once with another."""
+        fake_github.rate_limit = 5
+        fake_github.budgets['token a'] = 0
+        sleeps = []
+        github = gdc.Github(api=fake_github.url, tokens=['a', 'b'])
+        github.pool = TokenPool(['a', 'b'], sleep=sleeps.append)
+
+        assert github.get_user() == 'octocat'
+        assert sleeps == [0] and fake_github.budgets['token b'] == 4
+
+
+####################
+# HELPER FUNCTIONS #
+####################
+
+def limit_headers(limit, remaining, reset):
+    """Return rate limit response headers."""
+    return {
+        'X-RateLimit-Limit': str(limit),
+        'X-RateLimit-Remaining': str(remaining),
+        'X-RateLimit-Reset': str(reset)
+    }
+
+
+def response(status, text='', headers=None):
+    """Return a minimal response."""
+    with requests_mock.Mocker() as mock:
+        mock.get('https://api.github.com/', status_code=status, text=text,
+                 headers=headers or {})
+        return requests.get('https://api.github.com/')
+
+
+#################
+# TEST FIXTURES #
+#################
+
+@pytest.fixture()
+def clock():
+    """Frozen clock."""
+    return lambda: 1000
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for state.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# standard imports
+import logging
+import os
+
+# external imports
+import pytest
+
+# application imports
+from gdc import gdc
+from gdc.state import Checkpoint, RepoState, default_path
+
+
+class TestRepoState:
+    """Test RepoState class."""
+
+    def test_default_path(self, monkeypatch):
+        """Test default_path lives next to the history database."""
+        monkeypatch.setenv('XDG_DATA_HOME', '/xdg')
+
+        assert default_path() == '/xdg/github-download-count/repos.json'
+
+    def test_get_unchanged(self, path):
+        """Test assets are reused for a repo without new activity."""
+        repo = {'full_name': 'octocat/repo', 'pushed_at': 'a',
+                'updated_at': 'b'}
+        state = RepoState(path)
+        state.set(repo, [('octocat', 'repo', 'v1', 'x.zip', 1, 2, 3)])
+        state.save()
+
+        assert RepoState(path).get(repo) == \
+            [['octocat', 'repo', 'v1', 'x.zip', 1, 2, 3]]
+
+    def test_get_changed(self, path):
+        """Test a repo with new activity is fetched again."""
+        state = RepoState(path)
+        state.set({'full_name': 'octocat/repo', 'pushed_at': 'a'}, [])
+
+        assert state.get({'full_name': 'octocat/repo',
+                          'pushed_at': 'c'}) is None
+
+    def test_get_expired(self, path):
+        """Test stored counts are refreshed after max_age."""
+        repo = {'full_name': 'octocat/repo', 'pushed_at': 'a'}
+        state = RepoState(path, max_age=-1)
+        state.set(repo, [])
+
+        assert state.get(repo) is None and state.skipped == 0
+
+    def test_incremental_refresh(self, capfd, fake_github, monkeypatch,
+                                 path):
+        """Test only repos with new activity are fetched again."""
+        monkeypatch.setattr(logging.root, 'level', logging.INFO)
+        github = gdc.Github(api=fake_github.url, state=RepoState(path))
+        first = list(github.get_assets_by_user('octocat'))
+
+        fake_github.requests = 0
+        fake_github.pushed_at['repo-003'] = '2016-02-01T00:00:00Z'
+        github = gdc.Github(jobs=4, api=fake_github.url,
+                            state=RepoState(path))
+        second = list(github.get_assets_by_user('octocat'))
+
+        # one repo listing and one release request
+        assert first == second and fake_github.requests == 2
+        assert capfd.readouterr()[1].endswith(
+            'INFO: octocat: skipped 9 release requests for repos without '
+            'new activity\n')
+
+
+class TestCheckpoint:
+    """Test Checkpoint class."""
+
+    def test_resume(self, path):
+        """Test a saved scan is resumed, another one starts afresh."""
+        checkpoint = Checkpoint(path)
+        checkpoint.start('octocat')
+        checkpoint.set('octocat', 'octocat/repo', [
+            ('octocat', 'repo', 'v1', 'x.zip', 1, 2, 3)])
+        checkpoint.save()
+
+        checkpoint = Checkpoint(path)
+        checkpoint.start('octocat')
+        assert checkpoint.get('octocat', 'octocat/repo') == \
+            [['octocat', 'repo', 'v1', 'x.zip', 1, 2, 3]]
+        checkpoint.start('github')
+        assert checkpoint.get('github', 'octocat/repo') is None
+
+    def test_set_saves(self, path):
+        """Test completed repos are saved every interval."""
+        checkpoint = Checkpoint(path, interval=0)
+        checkpoint.start('octocat')
+        checkpoint.set('octocat', 'octocat/repo', [])
+
+        assert Checkpoint(path).scans == {'octocat': {'octocat/repo': []}}
+
+    def test_finish(self, path):
+        """Test a completed scan is forgotten."""
+        checkpoint = Checkpoint(path)
+        checkpoint.start('octocat')
+        checkpoint.save()
+        checkpoint.finish('octocat')
+
+        assert not os.path.exists(path) and checkpoint.scans == {}
+
+    def test_several_scans(self, path):
+        """Test scans keep their progress when another starts or ends."""
+        checkpoint = Checkpoint(path)
+        checkpoint.start('octocat')
+        checkpoint.set('octocat', 'octocat/repo', [])
+        checkpoint.start('github')
+        checkpoint.set('github', 'github/repo', [])
+        assert checkpoint.get('octocat', 'octocat/repo') == []
+
+        checkpoint.finish('github')
+        assert Checkpoint(path).scans == {'octocat': {'octocat/repo': []}}
+
+    def test_resume_scan(self, fake_github, path):
+        """Test a scan resumes with the repos it had not done."""
+        releases = fake_github.releases.pop('repo-003')
+        github = gdc.Github(api=fake_github.url, checkpoint=Checkpoint(path),
+                            keep_going=True)
+        first = list(github.get_assets_by_user('octocat'))
+        assert github.failures == [('octocat/repo-003', 'Not Found')]
+
+        fake_github.releases['repo-003'] = releases
+        fake_github.requests = 0
+        github = gdc.Github(jobs=4, api=fake_github.url,
+                            checkpoint=Checkpoint(path))
+        second = list(github.get_assets_by_user('octocat'))
+
+        # one repo listing and one release request
+        assert fake_github.requests == 2 and not github.failures
+        assert [a for a in second if a.repo != 'repo-003'] == first
+        assert len(second) == len(first) + 6 and not os.path.exists(path)
+
+    def test_interrupted_scan(self, fake_github, path):
+        """Test an interrupted scan keeps the repos it has done."""
+        github = gdc.Github(api=fake_github.url, checkpoint=Checkpoint(path))
+        assets = github.get_assets_by_user('octocat')
+        for _ in range(13):
+            next(assets)
+        assets.close()
+
+        assert sorted(Checkpoint(path).scans['octocat']) == \
+            ['octocat/repo-000', 'octocat/repo-001', 'octocat/repo-002']
+
+    def test_interrupted_scan_other_target(self, fake_github, path):
+        """Test scanning another target keeps an interrupted one's repos."""
+        checkpoint = Checkpoint(path)
+        github = gdc.Github(api=fake_github.url, checkpoint=checkpoint)
+        assets = github.get_assets_by_user('octocat')
+        for _ in range(13):
+            next(assets)
+        assets.close()
+        list(github.get_assets_by_user('hubot'))
+
+        assert sorted(Checkpoint(path).scans) == ['octocat']
+        assert len(checkpoint.scans['octocat']) == 3
+
+
+#################
+# TEST FIXTURES #
+#################
+
+@pytest.fixture()
+def path(tmpdir):
+    """Path of a state file in a temporary directory."""
+    return str(tmpdir.join('repos.json'))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for stats.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# external imports
+import pytest
+
+# application imports
+from gdc.stats import Call, Stats, percentile, template
+
+
+@pytest.mark.parametrize('url,expected', [
+    ('https://api.github.com/users/x/repos?per_page=100',
+     '/users/:user/repos'),
+    ('https://api.github.com/users/x', '/users/:user'),
+    ('https://api.github.com/orgs/x/repos?type=all', '/orgs/:org/repos'),
+    ('https://api.github.com/repos/x/y/releases',
+     '/repos/:owner/:repo/releases'),
+    ('https://api.github.com/repos/x/y/releases/tags/v/1',
+     '/repos/:owner/:repo/releases/tags/:tag'),
+    ('https://api.github.com/rate_limit', '/rate_limit')
+])
+def test_template(url, expected):
+    """Test URLs are reduced to path templates."""
+    assert template(url) == expected
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+
+    assert [percentile(values, p) for p in (50, 95, 99, 100)] == \
+        [50, 95, 99, 100]
+    assert percentile([7], 99) == 7 and percentile([], 50) == 0
+
+
+def test_summary():
+    """Test calls are aggregated overall and per template."""
+    stats = Stats()
+    for latency in (0.01, 0.02, 0.03):
+        stats(Call('GET', '/user', '', 200, 10, latency, 1, 'miss', None))
+    stats(Call('POST', '/graphql', '', 200, 5, 0.1, 0, None, None))
+    stats(Call('GET', '/user', '', None, 0, 0, 0, 'avoided', None))
+
+    lines = stats.summary()
+
+    assert lines[0] == '4 requests, 3 retries, 35 bytes, 0 cache hits, ' \
+        '3 cache misses, 1 avoided'
+    assert lines[1].split() == ['all', '4', 'p50', '20.0ms', 'p95',
+                                '100.0ms', 'p99', '100.0ms']
+    assert lines[2].split()[:5] == ['GET', '/user', '3', 'p50', '20.0ms']
+    assert lines[3].split()[:2] == ['POST', '/graphql']
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=invalid-name,no-init,no-self-use,old-style-class,protected-access,redefined-outer-name,too-few-public-methods
+"""Tests for store.py"""
+
+# Python 2 forwards-compatibility
+from __future__ import absolute_import
+
+# external imports
+import pytest
+
+# application imports
+from gdc import gdc
+from gdc.store import (DAY, USAGE, USAGE_COLUMNS, WEEK, Delta, Store, Usage,
+                       default_path, floor)
+
+
+class TestStore:
+    """Test Store class."""
+
+    def test_default_path(self, monkeypatch):
+        """Test default_path honours XDG_DATA_HOME."""
+        monkeypatch.setenv('XDG_DATA_HOME', '/xdg')
+
+        assert default_path() == \
+            '/xdg/github-download-count/history.sqlite3'
+
+    def test_record_only_changes(self, store):
+        """Test only assets whose count changed are written."""
+        assert store.record([asset(1, 5), asset(2, 7)], 100) == 2
+        assert store.record([asset(1, 5), asset(2, 9)], 200) == 1
+        assert store.record([asset(1, 5), asset(2, 9)], 300) == 0
+
+        assert store.connection.execute(
+            'SELECT COUNT(*) FROM snapshot').fetchone()[0] == 3
+
+    def test_snapshot(self, store):
+        """Test snapshot passes assets through and records them."""
+        assets = [asset(1, 5), asset(2, 7)]
+
+        assert list(store.snapshot(iter(assets), 100)) == assets
+        assert store.record(assets, 200) == 0
+
+    def test_deltas(self, store):
+        """Test downloads between two times."""
+        store.record([asset(1, 5), asset(2, 7)], 100)
+        store.record([asset(1, 15), asset(2, 8)], 200)
+        store.record([asset(1, 20), asset(3, 4)], 300)
+        store.record([asset(3, 10)], 400)
+
+        assert store.deltas(150, 350) == [
+            Delta('octocat', 'repo', 'v1', 'asset-1', 15),
+            Delta('octocat', 'repo', 'v1', 'asset-2', 1),
+            Delta('octocat', 'repo', 'v1', 'asset-3', 0)
+        ]
+        assert store.deltas(100, 400, repo='repo') == [
+            Delta('octocat', 'repo', 'v1', 'asset-1', 15),
+            Delta('octocat', 'repo', 'v1', 'asset-2', 1),
+            Delta('octocat', 'repo', 'v1', 'asset-3', 6)
+        ]
+        assert store.deltas(0, 50) == []
+        assert store.deltas(0, 400, user='nobody') == []
+
+    def test_deltas_uses_index(self, store):
+        """Test delta queries are answered from the snapshot index."""
+        plan = ' '.join(row[-1] for row in store.connection.execute(
+            'EXPLAIN QUERY PLAN SELECT download_count FROM snapshot '
+            'WHERE asset_id = 1 AND time <= 5 ORDER BY time DESC LIMIT 1'))
+
+        assert 'USING PRIMARY KEY' in plan and 'SCAN' not in plan
+
+    def test_floor(self):
+        """Test days start at midnight and weeks on Monday (UTC)."""
+        # Wednesday 1970-01-14 12:00
+        assert floor(13 * DAY + DAY // 2, DAY) == 13 * DAY
+        assert floor(13 * DAY + DAY // 2, WEEK) == 11 * DAY
+
+    def test_usage(self, store):
+        """Test downloads per day and week are read from the rollups."""
+        store.record([asset(1, 5), asset(2, 7)], 11 * DAY)
+        store.record([asset(1, 15)], 11 * DAY + 100)
+        store.record([asset(1, 20), asset(3, 4)], 12 * DAY)
+        store.record([asset(2, 10), asset(3, 10)], 19 * DAY)
+
+        assert store.usage(11 * DAY, 19 * DAY) == [
+            Usage(11 * DAY, 'octocat', 'repo', 'v1', 'asset-1', 10),
+            Usage(12 * DAY, 'octocat', 'repo', 'v1', 'asset-1', 5),
+            Usage(19 * DAY, 'octocat', 'repo', 'v1', 'asset-2', 3),
+            Usage(19 * DAY, 'octocat', 'repo', 'v1', 'asset-3', 6)
+        ]
+        assert store.usage(12 * DAY, 19 * DAY, WEEK) == [
+            Usage(11 * DAY, 'octocat', 'repo', 'v1', 'asset-1', 15),
+            Usage(18 * DAY, 'octocat', 'repo', 'v1', 'asset-2', 3),
+            Usage(18 * DAY, 'octocat', 'repo', 'v1', 'asset-3', 6)
+        ]
+        assert store.usage(13 * DAY, 18 * DAY) == []
+        assert store.usage(0, 19 * DAY, user='nobody') == []
+
+    def test_usage_by(self, store):
+        """Test downloads per day summed per repo and user."""
+        store.record([asset(1, 5), asset(2, 7)], 11 * DAY)
+        store.record([asset(1, 15), asset(2, 9)], 12 * DAY)
+
+        assert store.usage(11 * DAY, 12 * DAY, by='repo') == [
+            Usage(12 * DAY, 'octocat', 'repo', None, None, 12)]
+        assert store.usage(11 * DAY, 12 * DAY, by='user') == [
+            Usage(12 * DAY, 'octocat', None, None, None, 12)]
+
+    def test_usage_uses_index(self, store):
+        """Test usage queries are range scans of the rollup key."""
+        plan = ' '.join(row[-1] for row in store.connection.execute(
+            'EXPLAIN QUERY PLAN ' + USAGE % USAGE_COLUMNS['user'], {
+                'period': DAY, 'start': 0, 'end': DAY, 'user': None,
+                'repo': None}))
+
+        assert 'SEARCH rollup USING PRIMARY KEY' in plan
+        assert 'SCAN rollup' not in plan
+
+    def test_rollup_migration(self, tmpdir):
+        """Test snapshots recorded before rollups are rolled up."""
+        path = str(tmpdir.join('history.sqlite3'))
+        store = Store(path)
+        store.record([asset(1, 5)], 11 * DAY)
+        store.record([asset(1, 9)], 12 * DAY)
+        store.connection.execute('DELETE FROM rollup')
+        store.connection.execute('PRAGMA user_version = 0')
+        store.connection.commit()
+        store.close()
+
+        store = Store(path)
+        try:
+            assert store.usage(11 * DAY, 12 * DAY) == [
+                Usage(12 * DAY, 'octocat', 'repo', 'v1', 'asset-1', 4)]
+            assert store.connection.execute(
+                'SELECT COUNT(*) FROM rollup').fetchone()[0] == 3
+        finally:
+            store.close()
+
+    def test_show_records_history(self, fake_github, store):
+        """Test show records a snapshot of what it fetched."""
+        github = gdc.Github(api=fake_github.url, store=store)
+        github.show('octocat', summarize=True)
+        github.show('octocat', summarize=True)
+
+        assert store.connection.execute(
+            'SELECT COUNT(*) FROM snapshot').fetchone()[0] == 60
+
+
+####################
+# HELPER FUNCTIONS #
+####################
+
+def asset(identifier, download_count):
+    """Return an Asset record."""
+    return gdc.Asset('octocat', 'repo', 'v1', 'asset-%d' % identifier,
+                     download_count, 1, identifier)
+
+
+#################
+# TEST FIXTURES #
+#################
+
+@pytest.fixture()
+def store(tmpdir):
+    """Empty store in a temporary directory."""
+    store = Store(str(tmpdir.join('history.sqlite3')))
+    yield store
+    store.close()